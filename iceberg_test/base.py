@@ -1,9 +1,30 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, fields
+from datetime import datetime
+from typing import (
+    AsyncIterator,
+    Callable,
+    Dict,
+    Any,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+import asyncio
 import logging
+import pyarrow as pa
+import queue
+import requests
 import tempfile
+import threading
+import time
 import yaml
 from pathlib import Path
+import socket
 import subprocess
 import os
 import uuid
@@ -12,13 +33,109 @@ import uuid
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Shared by every component that tunnels a local service to the internet
+NGROK_IMAGE = "ngrok/ngrok:3.19.0-alpine"
+
+# Record batches a streamed query fetches ahead of its consumer
+STREAM_BUFFER = 4
+
+
+class PortAllocator:
+    """Hands out free host ports to the components of one test run.
+
+    Ports are keyed by purpose (e.g. "trino" or "minio_console") so a component
+    gets the same port every time it asks. Ports handed out by any allocator in
+    this process are never handed out again until released, which keeps
+    concurrent test runs from racing for the same port."""
+
+    _reserved: Set[int] = set()
+    _lock = threading.Lock()
 
-class TestContext:
     def __init__(self):
+        self._ports: Dict[str, int] = {}
+
+    def get(self, key: str) -> int:
+        with self._lock:
+            if key not in self._ports:
+                self._ports[key] = self._find_free_port()
+                logger.debug(f"Allocated host port {self._ports[key]} for {key}")
+            return self._ports[key]
+
+    def release(self) -> None:
+        with self._lock:
+            PortAllocator._reserved.difference_update(self._ports.values())
+            self._ports.clear()
+
+    def _find_free_port(self) -> int:
+        while True:
+            # Let the OS pick a port that is currently free on the host
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+                sock.bind(("", 0))
+                port = sock.getsockname()[1]
+            if port not in PortAllocator._reserved:
+                PortAllocator._reserved.add(port)
+                return port
+
+
+class TeardownQueue:
+    """Runs the teardown of finished test runs on a background worker pool.
+
+    Only components whose resource names are unique per test run are torn
+    down here, so the next stack can start while the previous one is still
+    being torn down. Components with `fixed_names` tear down synchronously.
+    Failures are collected rather than raised, and reported by `wait()`."""
+
+    def __init__(self, max_workers: int = 4):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="teardown"
+        )
+        self._futures: List[Future] = []
+        self._failures: List[Tuple[str, Exception]] = []
+        self._lock = threading.Lock()
+
+    def submit(self, label: str, steps: List[Tuple[str, Callable[[], None]]]):
+        """Run the steps in order in the background. A failing step doesn't
+        stop the ones after it, so one stuck resource doesn't leak the rest."""
+
+        def run():
+            for name, step in steps:
+                try:
+                    step()
+                except Exception as e:
+                    logger.error(f"Background teardown of {name} ({label}) failed: {e}")
+                    with self._lock:
+                        self._failures.append((f"{name} ({label})", e))
+
+        self._futures.append(self._executor.submit(run))
+
+    def wait(self) -> List[Tuple[str, Exception]]:
+        """Wait for every outstanding teardown and return the failures."""
+        if self._futures:
+            logger.info(f"Waiting for {len(self._futures)} background teardowns")
+        for future in self._futures:
+            future.result()
+        self._executor.shutdown()
+        return list(self._failures)
+
+
+class TestContext:
+    def __init__(
+        self,
+        teardown_queue: Optional[TeardownQueue] = None,
+        options: Optional[Dict[str, Any]] = None,
+    ):
+        """With a `teardown_queue`, components and the network are torn down in
+        the background once the context exits. `options` configure components,
+        e.g. "trino_workers"."""
         # Generate a unique name for this test run
         self.test_run_name = uuid.uuid4().hex[:8]
         self.docker_network_name = f"iceberg-test-{self.test_run_name}"
+        self.compose_project_name = f"iceberg_test_{self.test_run_name}"
         self._docker_network_created = False
+        self.ports = PortAllocator()
+        self.teardown_queue = teardown_queue
+        self.options = options or {}
+        self._deferred_teardowns: List[Tuple[str, Callable[[], None]]] = []
 
     def __enter__(self):
         # All components are given a shared docker network because many of them
@@ -29,9 +146,24 @@ class TestContext:
         return self
 
     def __exit__(self, exc_type, exc_value, traceback):
+        if self.teardown_queue is not None:
+            # The network and ports go last, once every container is gone
+            steps = self._deferred_teardowns + [
+                ("network", self.cleanup_network),
+                ("ports", self.ports.release),
+            ]
+            self._deferred_teardowns = []
+            self.teardown_queue.submit(self.test_run_name, steps)
+            return False
+
         self.cleanup_network()
+        self.ports.release()
         return False
 
+    def defer_teardown(self, name: str, teardown: Callable[[], None]):
+        """Queue a teardown to run in the background when the context exits."""
+        self._deferred_teardowns.append((name, teardown))
+
     def ensure_network(self):
         """Ensure the test network exists."""
         if not self._docker_network_created:
@@ -71,9 +203,125 @@ class TestContext:
                 )
 
 
+class ReadinessProbe(ABC):
+    """Client-side check that a service is ready to take requests.
+
+    Polled with exponential backoff starting at tens of milliseconds, so a
+    service is used as soon as it is ready instead of at the next tick of a
+    coarse compose healthcheck interval."""
+
+    def __init__(
+        self,
+        name: str,
+        initial_interval: float = 0.025,
+        max_interval: float = 1.0,
+        timeout: float = 180.0,
+    ):
+        self.name = name
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.timeout = timeout
+
+    @abstractmethod
+    def check(self) -> bool:
+        """Whether the service is ready. Exceptions count as not ready."""
+        pass
+
+    def wait(self, since: Optional[float] = None) -> float:
+        """Block until the service is ready and return the time to ready,
+        measured from `since` (a time.monotonic() value) if given."""
+        start = time.monotonic()
+        since = start if since is None else since
+        interval = self.initial_interval
+        last_error = None
+
+        while True:
+            try:
+                if self.check():
+                    time_to_ready = time.monotonic() - since
+                    logger.info(f"{self.name} ready after {time_to_ready:.2f}s")
+                    return time_to_ready
+                last_error = None
+            except Exception as e:
+                last_error = e
+
+            if time.monotonic() - start > self.timeout:
+                raise TimeoutError(
+                    f"{self.name} not ready after {self.timeout}s"
+                    + (f": {last_error}" if last_error else "")
+                )
+            time.sleep(interval)
+            interval = min(interval * 2, self.max_interval)
+
+
+class HttpProbe(ReadinessProbe):
+    """Ready once a GET on the URL succeeds (or satisfies `ready`)."""
+
+    def __init__(
+        self,
+        name: str,
+        url: str,
+        ready: Optional[Callable[[requests.Response], bool]] = None,
+        **kwargs,
+    ):
+        super().__init__(name, **kwargs)
+        self.url = url
+        self.ready = ready or (lambda response: response.ok)
+
+    def check(self) -> bool:
+        return self.ready(requests.get(self.url, timeout=5))
+
+
+class TcpProbe(ReadinessProbe):
+    """Ready once the port accepts connections."""
+
+    def __init__(self, name: str, host: str, port: int, **kwargs):
+        super().__init__(name, **kwargs)
+        self.host = host
+        self.port = port
+
+    def check(self) -> bool:
+        with socket.create_connection((self.host, self.port), timeout=5):
+            return True
+
+
+class SqlProbe(ReadinessProbe):
+    """Ready once `execute` runs the query (and the rows satisfy `ready`)."""
+
+    def __init__(
+        self,
+        name: str,
+        execute: Callable[[str], Any],
+        query: str = "SELECT 1",
+        ready: Optional[Callable[[Any], bool]] = None,
+        **kwargs,
+    ):
+        super().__init__(name, **kwargs)
+        self.execute = execute
+        self.query = query
+        self.ready = ready or (lambda rows: True)
+
+    def check(self) -> bool:
+        return self.ready(self.execute(self.query))
+
+
 class DockerCompose:
-    def __init__(self, yaml):
+    def __init__(
+        self,
+        yaml,
+        project_name: str,
+        probes: Optional[List[ReadinessProbe]] = None,
+        timings: Optional[Dict[str, float]] = None,
+    ):
+        """Without probes, `start()` relies on the compose healthchecks via
+        `docker-compose up --wait`. With probes, the seconds until every
+        service is ready are recorded as the "ready" phase in `timings`, the
+        owning component's."""
         self.yaml = yaml
+        self.project_name = project_name
+        self.probes = probes or []
+        self.timings = timings
+        self.time_to_ready: Dict[str, float] = {}
 
     def start(self):
         # Create temporary docker-compose file
@@ -83,10 +331,21 @@ class DockerCompose:
         with tmp:
             tmp.write(self.yaml)
 
-        # Start services and wait for them to be healthy
-        self._run_compose_command(
-            "-f", str(self._compose_file), "up", "-d", "-V", "--wait"
-        )
+        if not self.probes:
+            # Start services and wait for them to be healthy
+            self._run_compose_command(
+                "-f", str(self._compose_file), "up", "-d", "-V", "--wait"
+            )
+            return
+
+        # Start services, then poll them from here rather than waiting on the
+        # compose healthcheck intervals
+        self._run_compose_command("-f", str(self._compose_file), "up", "-d", "-V")
+        started_at = time.monotonic()
+        for probe in self.probes:
+            self.time_to_ready[probe.name] = probe.wait(since=started_at)
+        if self.timings is not None:
+            self.timings["ready"] = max(self.time_to_ready.values())
 
     def stop(self) -> None:
         if self._compose_file:
@@ -100,7 +359,7 @@ class DockerCompose:
 
     def _run_compose_command(self, *args: str) -> None:
         """Run a docker-compose command"""
-        cmd = ["docker-compose", "-p", "iceberg_test", *args]
+        cmd = ["docker-compose", "-p", self.project_name, *args]
         logger.debug(f"Running command: {' '.join(cmd)}")
         try:
             subprocess.run(cmd, check=True, env=os.environ)
@@ -112,24 +371,74 @@ class DockerCompose:
 class IcebergComponent(ABC):
     """Base class for all Iceberg test components."""
 
+    # Docker images used by the component, so they can be pulled ahead of time
+    images: List[str] = []
+    # Rough seconds a setup + teardown takes, used to plan matrix runs until
+    # real timings have been recorded
+    expected_duration: float = 30.0
+    # Whether the component creates account-wide resources under fixed names
+    # rather than names built from the test run, so two runs of it can't
+    # overlap
+    fixed_names: bool = False
+
     def __init__(self, test_context: TestContext):
         self.test_context = test_context
+        # Seconds spent in each lifecycle phase (setup, boot, wire, teardown),
+        # and until its services were ready (ready, part of boot)
+        self.timings: Dict[str, float] = {}
+        # Whether teardown may be handed to the context's teardown queue. Turn
+        # off when something reuses this component's ports or compose project
+        # right after it exits. Never on with fixed names, the next run could
+        # already be setting up the resources a deferred teardown drops.
+        self.background_teardown = not self.fixed_names
 
     def __enter__(self):
         logger.info(f"{self.name} setup()")
-        self.setup()
+        with self.timed("setup"):
+            self.setup()
         logger.info(f"{self.name} setup() done")
         return self
 
     def __exit__(self, exc_type, exc_value, traceback):
+        if self.background_teardown and self.test_context.teardown_queue is not None:
+            logger.info(f"{self.name} teardown() deferred to the background")
+            self.test_context.defer_teardown(self.name, self._timed_teardown)
+        else:
+            self._timed_teardown()
+        return False  # Return True to suppress the exception
+
+    def _timed_teardown(self):
         logger.info(f"{self.name} teardown()")
-        self.teardown()
+        with self.timed("teardown"):
+            self.teardown()
         logger.info(f"{self.name} teardown() done")
-        return False  # Return True to suppress the exception
 
-    @abstractmethod
+    @contextmanager
+    def timed(self, phase: str) -> Iterator[None]:
+        """Record how long the block took as the timing of `phase`."""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.timings[phase] = time.monotonic() - start
+
+    @property
+    def dependencies(self) -> List["IcebergComponent"]:
+        """Components that must be wired before this one can be"""
+        return []
+
     def setup(self) -> None:
         """Start the component and wait for it to be ready"""
+        self.boot()
+        self.wire()
+
+    def boot(self) -> None:
+        """Start everything that doesn't need the dependencies to be ready,
+        such as containers. May run concurrently with other components."""
+        pass
+
+    def wire(self) -> None:
+        """Finish setup once boot() is done and the dependencies are wired"""
         pass
 
     @abstractmethod
@@ -152,6 +461,10 @@ class Catalog(IcebergComponent):
         super().__init__(test_context)
         self.storage = storage
 
+    @property
+    def dependencies(self) -> List[IcebergComponent]:
+        return [self.storage]
+
     @property
     @abstractmethod
     def catalog_name(self) -> str:
@@ -164,6 +477,114 @@ class Catalog(IcebergComponent):
         pass
 
 
+def prefetch(
+    batches: Iterator[pa.RecordBatch], buffer: int
+) -> Iterator[pa.RecordBatch]:
+    """Iterate `batches` on a background thread, at most `buffer` items ahead
+    of the consumer. Errors are raised in the consumer. When the consumer
+    stops early, `batches` is closed."""
+    items: queue.Queue = queue.Queue(maxsize=max(1, buffer))
+    stopped = threading.Event()
+    done = object()
+
+    def put(item) -> bool:
+        while not stopped.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for batch in batches:
+                if not put(batch):
+                    return
+            put(done)
+        except BaseException as e:
+            put(e)
+        finally:
+            close = getattr(batches, "close", None)
+            if close is not None:
+                close()
+
+    producer = threading.Thread(
+        target=produce, name=f"{threading.current_thread().name}-prefetch"
+    )
+    producer.start()
+    try:
+        while True:
+            item = items.get()
+            if item is done:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stopped.set()
+        producer.join()
+
+
+@dataclass(frozen=True)
+class Partition:
+    """One field of a table's partition spec: an Iceberg transform applied to
+    a column. `parameter` is the bucket count for the bucket transform."""
+
+    column: str
+    transform: str = "identity"
+    parameter: Optional[int] = None
+
+    @property
+    def name(self) -> str:
+        if self.transform == "identity":
+            return self.column
+        return f"{self.column}_{self.transform}"
+
+
+@dataclass
+class QueryStats:
+    """The work an engine reports doing for a query, normalized across
+    engines. Times are in seconds. Fields an engine doesn't report are None."""
+
+    query_id: Optional[str] = None
+    rows_scanned: Optional[int] = None
+    bytes_scanned: Optional[int] = None
+    # Units of scan work, e.g. Trino splits: at least one per data file read
+    splits: Optional[int] = None
+    # Waiting for resources before the query could start
+    queued_time: Optional[float] = None
+    # Parsing, analysis and planning, before any data is read
+    planning_time: Optional[float] = None
+    # Summed over every thread on every node, so it can exceed elapsed_time
+    cpu_time: Optional[float] = None
+    wall_time: Optional[float] = None
+    elapsed_time: Optional[float] = None
+    peak_memory_bytes: Optional[int] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The fields the engine reported."""
+        return {
+            name: round(value, 4) if isinstance(value, float) else value
+            for name, value in asdict(self).items()
+            if value is not None
+        }
+
+    @classmethod
+    def total(cls, stats: List["QueryStats"]) -> "QueryStats":
+        """Sum of the stats of several queries, peak memory being the highest."""
+        total = cls()
+        for field in fields(cls):
+            if field.name == "query_id":
+                continue
+            values = [getattr(s, field.name) for s in stats]
+            values = [value for value in values if value is not None]
+            if values:
+                combine = max if field.name == "peak_memory_bytes" else sum
+                setattr(total, field.name, combine(values))
+        return total
+
+
 class QueryEngine(IcebergComponent):
     """Base class for query engine implementations."""
 
@@ -171,6 +592,72 @@ class QueryEngine(IcebergComponent):
         super().__init__(test_context)
         self.storage = storage
         self.catalog = catalog
+        self._captures = threading.local()
+
+    @property
+    def dependencies(self) -> List[IcebergComponent]:
+        return [self.storage, self.catalog]
+
+    def execute_query(self, query: str) -> List[List[Any]]:
+        """Execute a SQL query, recording how long it took and the engine's
+        statistics."""
+        rows, _ = self.execute_query_with_stats(query)
+        return rows
+
+    def execute_query_with_stats(
+        self, query: str
+    ) -> Tuple[List[List[Any]], QueryStats]:
+        """Execute a SQL query, returning what the engine reports about the
+        work it did along with the rows."""
+        with self._record(query) as record:
+            rows, stats = self._execute_query_with_stats(query)
+            record["stats"] = stats
+            return rows, stats
+
+    def stream_query(
+        self, query: str, buffer: int = STREAM_BUFFER
+    ) -> Iterator[pa.RecordBatch]:
+        """Execute a SQL query, yielding its result as Arrow record batches.
+
+        Batches are fetched on a background thread, at most `buffer` ahead of
+        the consumer, so results of any size stream in bounded memory. Closing
+        the iterator early stops the query."""
+        with self._record(query):
+            yield from prefetch(self._stream_query(query), buffer)
+
+    @contextmanager
+    def _record(self, query: str) -> Iterator[Dict[str, Any]]:
+        """Time the block, and add a record of the query to the captures of
+        this thread. The block may add to the record."""
+        record = {"query": query}
+        start = time.monotonic()
+        try:
+            yield record
+        finally:
+            record["duration"] = time.monotonic() - start
+            for records in self._capture_stack():
+                records.append(record)
+
+    def complete_stats(self, stats: List[QueryStats]) -> None:
+        """Fill in statistics the engine only reports after the fact, e.g. from
+        its query history, in one round trip for many queries."""
+        pass
+
+    @contextmanager
+    def capture_queries(self) -> Iterator[List[Dict[str, Any]]]:
+        """Collect a record of every query this thread runs within the block."""
+        records = []
+        captures = self._capture_stack()
+        captures.append(records)
+        try:
+            yield records
+        finally:
+            captures.remove(records)
+
+    def _capture_stack(self) -> List[List[Dict[str, Any]]]:
+        if not hasattr(self._captures, "stack"):
+            self._captures.stack = []
+        return self._captures.stack
 
     @abstractmethod
     def link_table(self, test_table: str) -> None:
@@ -181,9 +668,104 @@ class QueryEngine(IcebergComponent):
         pass
 
     @abstractmethod
-    def execute_query(self, query: str) -> List[List[Any]]:
+    def _execute_query(self, query: str) -> List[List[Any]]:
         pass
 
     @abstractmethod
-    def create_table(self, test_table: str) -> None:
+    def create_table(
+        self, test_table: str, partitioning: Optional[List[Partition]] = None
+    ) -> None:
         pass
+
+    def _execute_query_with_stats(
+        self, query: str
+    ) -> Tuple[List[List[Any]], QueryStats]:
+        """Engines that report statistics override this."""
+        return self._execute_query(query), QueryStats()
+
+    def _stream_query(self, query: str) -> Iterator[pa.RecordBatch]:
+        raise NotImplementedError(f"{self.name} doesn't stream results")
+
+    def async_engine(self) -> "AsyncQueryEngine":
+        """Asyncio interface to this engine. Engines whose drivers can submit
+        queries without blocking a thread override this."""
+        return AsyncQueryEngine(self)
+
+    def compact_table(self, test_table: str) -> None:
+        """Rewrite the table's small data files into fewer, larger ones."""
+        raise NotImplementedError(f"{self.name} doesn't support compaction")
+
+    def version_as_of(self, test_table: str, snapshot_id: int) -> str:
+        """Reference to the table as of an Iceberg snapshot, to select from."""
+        raise NotImplementedError(f"{self.name} doesn't support time travel")
+
+    def timestamp_as_of(self, test_table: str, timestamp: datetime) -> str:
+        """Reference to the table as of a point in time, to select from."""
+        raise NotImplementedError(f"{self.name} doesn't support time travel")
+
+
+class AsyncQueryEngine:
+    """Asyncio counterpart of a QueryEngine, to keep many queries in flight
+    from one event loop.
+
+    This implementation runs the engine's blocking calls on a pool of up to
+    `max_workers` threads. Subclasses submit queries natively where the
+    driver allows it. Queries are recorded in the captures of the thread
+    running the event loop. Use as an async context manager, or call
+    `close()` when done."""
+
+    def __init__(self, engine: QueryEngine, max_workers: int = 32):
+        self.engine = engine
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=f"{engine.name}-async"
+        )
+
+    async def __aenter__(self) -> "AsyncQueryEngine":
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+        return False
+
+    async def execute(self, query: str) -> List[List[Any]]:
+        """Execute a SQL query, recording how long it took."""
+        with self.engine._record(query):
+            return await self._execute(query)
+
+    async def stream(
+        self, query: str, buffer: int = STREAM_BUFFER
+    ) -> AsyncIterator[pa.RecordBatch]:
+        """Execute a SQL query, yielding its result as Arrow record batches.
+        At most `buffer` batches are fetched ahead of the consumer."""
+        with self.engine._record(query):
+            async for batch in self._stream(query, buffer):
+                yield batch
+
+    async def close(self) -> None:
+        self._executor.shutdown(wait=False)
+
+    async def run_blocking(self, function: Callable, *args) -> Any:
+        """Run a blocking call on the adapter's threads."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, function, *args)
+
+    async def _execute(self, query: str) -> List[List[Any]]:
+        return await self.run_blocking(self.engine._execute_query, query)
+
+    async def _stream(self, query: str, buffer: int) -> AsyncIterator[pa.RecordBatch]:
+        async for batch in self.iterate(
+            prefetch(self.engine._stream_query(query), buffer)
+        ):
+            yield batch
+
+    async def iterate(
+        self, batches: Iterator[pa.RecordBatch]
+    ) -> AsyncIterator[pa.RecordBatch]:
+        """Iterate a blocking iterator from the event loop, closing it when
+        done."""
+        done = object()
+        try:
+            while (batch := await self.run_blocking(next, batches, done)) is not done:
+                yield batch
+        finally:
+            await self.run_blocking(batches.close)
@@ -0,0 +1,55 @@
+from typing import Any, Callable, Dict, List, Tuple, TypeVar
+import math
+import time
+
+T = TypeVar("T")
+
+PERCENTILES = {"p50": 50, "p95": 95, "p99": 99}
+
+
+def percentile(samples: List[float], q: float) -> float:
+    """The `q`th percentile of `samples`, interpolating between the closest
+    ranks like numpy's default method."""
+    ordered = sorted(samples)
+    rank = (len(ordered) - 1) * q / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """min / p50 / p95 / p99 / max of latency samples, in seconds."""
+    if not samples:
+        return {}
+    summary = {"min": min(samples)}
+    for name, q in PERCENTILES.items():
+        summary[name] = percentile(samples, q)
+    summary["max"] = max(samples)
+    return {name: round(value, 4) for name, value in summary.items()}
+
+
+class LatencyBenchmark:
+    """Times a query over repeated runs.
+
+    The first `warmup` runs are discarded, since JIT compilation, metadata
+    caches and fresh object store connections dominate them. The next
+    `repetitions` runs are the samples."""
+
+    def __init__(self, warmup: int = 3, repetitions: int = 10):
+        self.warmup = warmup
+        self.repetitions = max(1, repetitions)
+
+    def measure(self, run: Callable[[], T]) -> Tuple[T, List[float]]:
+        """Call `run` warmup + repetitions times. Returns the result of the
+        last call and the latency of each measured one."""
+        for _ in range(self.warmup):
+            run()
+
+        samples = []
+        for _ in range(self.repetitions):
+            start = time.perf_counter()
+            result = run()
+            samples.append(time.perf_counter() - start)
+        return result, samples
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"warmup": self.warmup, "repetitions": self.repetitions}
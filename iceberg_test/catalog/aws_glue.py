@@ -8,6 +8,8 @@ import pyarrow as pa
 class AWSGlueCatalog(Catalog):
     name = "aws_glue"
     description = "AWS Glue"
+    expected_duration = 10.0
+    fixed_names = True
 
     @property
     def iceberg_uri(self):
@@ -26,7 +28,7 @@ class AWSGlueCatalog(Catalog):
             "rest.signing-name": "glue",
         }
 
-    def setup(self):
+    def wire(self):
         glue_client = boto3.client("glue")
 
         response = glue_client.create_database(
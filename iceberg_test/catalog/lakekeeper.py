@@ -4,12 +4,17 @@ import requests
 import time
 import json
 
+LAKEKEEPER_IMAGE = "quay.io/lakekeeper/catalog:latest-main"
+CURL_IMAGE = "curlimages/curl"
+POSTGRES_IMAGE = "bitnami/postgresql:16.3.0"
+
 
 class LakekeeperCatalog(Catalog):
     """Lakekeeper catalog implementation."""
 
     name = "lakekeeper"  # Used for CLI discovery
     description = "Lakekeeper REST catalog service for Apache Iceberg"
+    images = [LAKEKEEPER_IMAGE, CURL_IMAGE, POSTGRES_IMAGE]
 
     @property
     def catalog_name(self) -> str:
@@ -19,7 +24,9 @@ class LakekeeperCatalog(Catalog):
     def catalog_properties(self) -> Dict[str, Any]:
         raise NotImplementedError
 
-    def setup(self):
+    def wire(self):
+        # The initial warehouse is validated against the bucket, so the
+        # storage needs to be ready before the service starts
         self.start_service()
 
     def teardown(self):
@@ -54,7 +61,7 @@ class LakekeeperCatalog(Catalog):
         docker_compose_yaml = f"""
 services:
     server:
-        image: quay.io/lakekeeper/catalog:latest-main
+        image: {LAKEKEEPER_IMAGE}
         environment:
             - LAKEKEEPER__BASE_URI=http://server:8181
             - LAKEKEEPER__PG_ENCRYPTION_KEY=This-is-NOT-Secure!
@@ -79,7 +86,7 @@ services:
 
 
     migrate:
-        image: quay.io/lakekeeper/catalog:latest-main
+        image: {LAKEKEEPER_IMAGE}
         environment:
             - LAKEKEEPER__PG_ENCRYPTION_KEY=This-is-NOT-Secure!
             - LAKEKEEPER__PG_DATABASE_URL_READ=postgresql://postgres:postgres@db:5432/postgres
@@ -94,7 +101,7 @@ services:
             - {self.test_context.docker_network_name}
 
     bootstrap:
-        image: curlimages/curl
+        image: {CURL_IMAGE}
         depends_on:
             server:
                 condition: service_healthy
@@ -114,7 +121,7 @@ services:
             - {self.test_context.docker_network_name}
 
     initialwarehouse:
-        image: curlimages/curl
+        image: {CURL_IMAGE}
         depends_on:
             server:
                 condition: service_healthy
@@ -136,7 +143,7 @@ services:
             - {self.test_context.docker_network_name}
 
     db:
-        image: bitnami/postgresql:16.3.0
+        image: {POSTGRES_IMAGE}
         environment:
             - POSTGRESQL_USERNAME=postgres
             - POSTGRESQL_PASSWORD=postgres
@@ -156,7 +163,9 @@ networks:
         external: true
 
 """
-        self.docker_compose = DockerCompose(docker_compose_yaml)
+        self.docker_compose = DockerCompose(
+            docker_compose_yaml, self.test_context.compose_project_name
+        )
         self.docker_compose.start()
 
     def stop_service(self):
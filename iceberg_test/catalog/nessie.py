@@ -1,19 +1,22 @@
-from ..base import Catalog, logger, DockerCompose
+from ..base import Catalog, logger, DockerCompose, HttpProbe, NGROK_IMAGE
 from typing import Dict, Any
 from pyiceberg.catalog import load_catalog
-import requests
 from iceberg_test.storage.s3 import S3Storage
 from iceberg_test.storage.minio import MinioStorage
 from iceberg_test.storage.azure_storage import AzureADLSStorage
 from iceberg_test.storage.cloudflare_r2 import CloudflareR2
 from os import getenv
 
+NESSIE_IMAGE = "ghcr.io/projectnessie/nessie:0.102.5"
+POSTGRES_IMAGE = "postgres:15.10"
+
 
 class NessieCatalog(Catalog):
     """Nessie catalog implementation."""
 
     name = "nessie"  # Used for CLI discovery
     description = "Nessie versioned catalog service"
+    images = [POSTGRES_IMAGE, NESSIE_IMAGE, NGROK_IMAGE]
 
     @property
     def iceberg_uri(self):
@@ -21,6 +24,15 @@ class NessieCatalog(Catalog):
             f"https://hack25nessie-{self.test_context.test_run_name}.ngrok.io/iceberg"
         )
 
+    @property
+    def api_port(self) -> int:
+        return self.test_context.ports.get("nessie")
+
+    @property
+    def management_port(self) -> int:
+        """Host port of the Quarkus management endpoints (health checks)"""
+        return self.test_context.ports.get("nessie_management")
+
     @property
     def catalog_name(self) -> str:
         return "regression"
@@ -31,8 +43,10 @@ class NessieCatalog(Catalog):
             "uri": self.iceberg_uri,
         }
 
-    def setup(self):
+    def boot(self):
         self.start_service()
+
+    def wire(self):
         catalog = load_catalog(**self.catalog_properties)
         catalog.create_namespace(self.catalog_name)
 
@@ -67,21 +81,21 @@ class NessieCatalog(Catalog):
         docker_compose_yaml = f"""
 services:
     nessie_postgres:
-        image: postgres:15.10
+        image: {POSTGRES_IMAGE}
         environment:
             POSTGRES_DB: nessie
             POSTGRES_USER: nessie
             POSTGRES_PASSWORD: password123
         healthcheck:
             test: ['CMD', 'pg_isready', '-U', 'nessie']
-            interval: 5s
+            interval: 1s
             timeout: 5s
-            retries: 5
+            retries: 30
         networks:
             - {self.test_context.docker_network_name}
 
     nessie:
-        image: ghcr.io/projectnessie/nessie:0.102.5
+        image: {NESSIE_IMAGE}
         depends_on:
             nessie_postgres:
                 condition: service_healthy
@@ -103,34 +117,42 @@ services:
         networks:
             - {self.test_context.docker_network_name}
         ports:
-            - "19120:19120"
-            - "19121:9000"
+            - "{self.api_port}:19120"
+            - "{self.management_port}:9000"
 
     nessie_ngrok:
-        image: ngrok/ngrok:3.19.0-alpine
+        image: {NGROK_IMAGE}
         environment:
             NGROK_AUTHTOKEN: "{getenv('NGROK_AUTHTOKEN')}"
         command:
             - "http"
-            - "http://host.docker.internal:19120"
+            - "http://host.docker.internal:{self.api_port}"
             - "--domain"
             - "hack25nessie-{self.test_context.test_run_name}.ngrok.io"
         networks:
             - {self.test_context.docker_network_name}
         ports:
-          - "4042:4040"
+          - "{self.test_context.ports.get('nessie_ngrok')}:4040"
 
 networks:
     {self.test_context.docker_network_name}:
         external: true
 """
-        self.docker_compose = DockerCompose(docker_compose_yaml)
+        self.docker_compose = DockerCompose(
+            docker_compose_yaml,
+            self.test_context.compose_project_name,
+            probes=[
+                # Deep health check on the Quarkus management port
+                HttpProbe(
+                    "nessie",
+                    f"http://localhost:{self.management_port}/q/health",
+                    ready=lambda response: response.json()["status"] == "UP",
+                ),
+                HttpProbe("nessie_ngrok", f"{self.iceberg_uri}/v1/config"),
+            ],
+            timings=self.timings,
+        )
         self.docker_compose.start()
 
-        # Run a health check on the Quarkus management port (which we've exposed as 19121)
-        health_check_data = requests.get("http://localhost:19121/q/health").json()
-        if health_check_data["status"] != "UP":
-            raise Exception(f"Nessie failed deep health check: {health_check_data}")
-
     def stop_service(self):
         self.docker_compose.stop()
@@ -1,17 +1,30 @@
-from ..base import Catalog, DockerCompose
+from ..base import Catalog, DockerCompose, HttpProbe
 from typing import Dict, Any
 from iceberg_test.storage.s3 import S3Storage
 import requests
 
+# NOTE: there's no official Polaris docker image; you need to build one.
+POLARIS_IMAGE = "apache/polaris:latest"
+
 
 class PolarisCatalog(Catalog):
     name = "polaris"
     description = "Apache Polaris, developed and sponsored by Snowflake"
+    images = [POLARIS_IMAGE]
+    expected_duration = 60.0
 
     @property
     def catalog_name(self) -> str:
         return "regression" # TODO
 
+    @property
+    def api_port(self) -> int:
+        return self.test_context.ports.get("polaris")
+
+    @property
+    def management_port(self) -> int:
+        return self.test_context.ports.get("polaris_management")
+
     @property
     def iceberg_uri(self) -> str:
         return "http://polaris:8181/api/catalog"
@@ -25,8 +38,10 @@ class PolarisCatalog(Catalog):
             "oauth2.scope": "PRINCIPAL_ROLE:ALL"
         }
 
-    def setup(self):
+    def boot(self):
         self.start_service()
+
+    def wire(self):
         self.create_catalog()
 
     def start_service(self):
@@ -40,10 +55,10 @@ class PolarisCatalog(Catalog):
         docker_compose_yaml = f"""
 services:
     polaris:
-        image: apache/polaris:latest
+        image: {POLARIS_IMAGE}
         ports:
-            - "8181:8181"
-            - "8182:8182"
+            - "{self.api_port}:8181"
+            - "{self.management_port}:8182"
         networks:
             - {self.test_context.docker_network_name}
 
@@ -65,7 +80,16 @@ networks:
     {self.test_context.docker_network_name}:
         external: true
 """
-        self.docker_compose = DockerCompose(docker_compose_yaml)
+        self.docker_compose = DockerCompose(
+            docker_compose_yaml,
+            self.test_context.compose_project_name,
+            probes=[
+                HttpProbe(
+                    "polaris", f"http://localhost:{self.management_port}/q/health"
+                )
+            ],
+            timings=self.timings,
+        )
         self.docker_compose.start()
 
     def create_catalog(self):
@@ -78,7 +102,7 @@ networks:
             "scope": "PRINCIPAL_ROLE:ALL"
         }
         headers_token = {"Polaris-Realm": "default-realm"}
-        response = requests.post("http://localhost:8181/api/catalog/v1/oauth/tokens", data=data_token, headers=headers_token)
+        response = requests.post(f"http://localhost:{self.api_port}/api/catalog/v1/oauth/tokens", data=data_token, headers=headers_token)
         response.raise_for_status()
         token_data = response.json()
         token = token_data.get("access_token")
@@ -86,7 +110,7 @@ networks:
         if token == "unauthorized_client":
             raise Exception("Error: Failed to retrieve bearer token")
 
-        url_catalog = "http://localhost:8181/api/management/v1/catalogs"
+        url_catalog = f"http://localhost:{self.api_port}/api/management/v1/catalogs"
         data_catalog = {
             "catalog": {
                 "name": self.catalog_name,
@@ -116,7 +140,7 @@ networks:
         response.raise_for_status()
 
         # Add TABLE_WRITE_DATA privilege
-        url_grant = f"http://localhost:8181/api/management/v1/catalogs/{self.catalog_name}/catalog-roles/catalog_admin/grants"
+        url_grant = f"http://localhost:{self.api_port}/api/management/v1/catalogs/{self.catalog_name}/catalog-roles/catalog_admin/grants"
         data_grant = {
             "type": "catalog",
             "privilege": "TABLE_WRITE_DATA"
@@ -18,6 +18,8 @@ class SnowflakeCatalog(Catalog):
 
     name = "snowflake"  # Used for CLI discovery
     description = "Snowflake Open Catalog service"
+    expected_duration = 60.0
+    fixed_names = True
 
     @property
     def iceberg_uri(self):
@@ -51,7 +53,7 @@ class SnowflakeCatalog(Catalog):
             "warehouse": self.warehouse_name,
         }
 
-    def setup(self):
+    def wire(self):
         iam_client = boto3.client("iam")
 
         if isinstance(self.storage, S3Storage):
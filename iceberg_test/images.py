@@ -0,0 +1,122 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+import json
+import subprocess
+import threading
+
+from .base import logger
+
+DEFAULT_CACHE_PATH = Path(".cache/images.json")
+
+
+class ImageCache:
+    """Local record of the images we've already resolved.
+
+    Maps an image reference (e.g. `trinodb/trino:469`) to the image ID and
+    repo digest it resolved to. As long as the docker daemon still has that
+    image ID locally, the image is neither pulled nor inspected again."""
+
+    def __init__(self, path: Path = DEFAULT_CACHE_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        try:
+            self.images: Dict[str, Dict[str, Any]] = json.loads(
+                self.path.read_text()
+            )["images"]
+        except FileNotFoundError:
+            self.images = {}
+
+    def get(self, image: str) -> Optional[Dict[str, Any]]:
+        return self.images.get(image)
+
+    def record(self, image: str, image_id: str, digest: Optional[str]) -> None:
+        with self._lock:
+            self.images[image] = {
+                "id": image_id,
+                "digest": digest,
+                "resolved_at": datetime.now().isoformat(timespec="seconds"),
+            }
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps({"images": self.images}, indent=2) + "\n")
+
+
+def local_image_ids() -> Dict[str, str]:
+    """Image reference -> image ID for every image the docker daemon has."""
+    result = subprocess.run(
+        [
+            "docker",
+            "image",
+            "ls",
+            "--no-trunc",
+            "--format",
+            "{{.Repository}}:{{.Tag}} {{.ID}}",
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    images = {}
+    for line in result.stdout.splitlines():
+        reference, image_id = line.rsplit(" ", 1)
+        images[reference] = image_id
+        # Untagged references default to :latest, as they do for docker pull
+        if reference.endswith(":latest"):
+            images[reference[: -len(":latest")]] = image_id
+    return images
+
+
+def prefetch_images(
+    images: Iterable[str],
+    concurrency: int = 8,
+    refresh: bool = False,
+    cache: Optional[ImageCache] = None,
+) -> Dict[str, str]:
+    """Make sure every image is available locally, pulling missing ones in
+    parallel. Returns the outcome for each image: cached, present, pulled or
+    failed. With `refresh`, every image is pulled again to pick up moved tags."""
+    cache = cache or ImageCache()
+    images = sorted(set(images))
+    local = local_image_ids()
+
+    def prefetch(image: str) -> str:
+        cached = cache.get(image)
+        if not refresh and cached and cached["id"] == local.get(image):
+            return "cached"
+
+        outcome = "present"
+        if refresh or image not in local:
+            logger.info(f"Pulling {image}")
+            result = subprocess.run(
+                ["docker", "pull", "--quiet", image], capture_output=True, text=True
+            )
+            if result.returncode != 0:
+                logger.warning(f"Failed to pull {image}: {result.stderr.strip()}")
+                return "failed"
+            outcome = "pulled"
+
+        image_id, digest = _inspect(image)
+        cache.record(image, image_id, digest)
+        return outcome
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        outcomes = dict(zip(images, executor.map(prefetch, images)))
+
+    cache.save()
+    return outcomes
+
+
+def _inspect(image: str):
+    result = subprocess.run(
+        ["docker", "image", "inspect", image],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    details = json.loads(result.stdout)[0]
+    # Locally built images (like Polaris) have no repo digest
+    digests = details.get("RepoDigests") or [None]
+    return details["Id"], digests[0]
@@ -0,0 +1,246 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import ExitStack
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import json
+import os
+import threading
+import time
+
+from .base import logger
+from .database import Loader
+
+
+@dataclass(frozen=True)
+class StackSpec:
+    """One storage × catalog × query engine combination to test."""
+
+    storage: str
+    catalog: str
+    query_engine: str
+
+    @classmethod
+    def parse(cls, value: str) -> "StackSpec":
+        """Parse a `storage/catalog/query_engine` triple from the command line."""
+        parts = value.split("/")
+        if len(parts) != 3 or not all(parts):
+            raise ValueError(
+                f"Invalid stack '{value}', expected storage/catalog/query_engine"
+            )
+        return cls(*parts)
+
+    @property
+    def label(self) -> str:
+        return f"{self.storage}/{self.catalog}/{self.query_engine}"
+
+
+@dataclass
+class StackOutcome:
+    """Result of running the test suite against a single stack."""
+
+    spec: StackSpec
+    success: bool
+    results: List[Dict[str, Any]] = field(default_factory=list)
+    elapsed: float = 0.0
+    error: Optional[str] = None
+    # Component ("storage", "catalog", "query_engine") -> phase -> seconds
+    timings: Dict[str, Dict[str, float]] = field(default_factory=dict)
+
+
+DEFAULT_JOURNAL_PATH = Path(".cache/matrix-journal.jsonl")
+
+
+class CheckpointJournal:
+    """Append-only record of a matrix run's progress, one JSON object per line.
+
+    A line is written (and fsynced) after every test and after every stack, so
+    a run that dies halfway can be resumed by skipping the stacks that already
+    completed. Stacks that ended in an error (as opposed to failed tests) are
+    not considered complete and run again on resume.
+
+    The first line records the run's `settings` (suite, scale factor, ...). A
+    journal written with other settings can't be resumed, its results would
+    be mixed with those of a different configuration."""
+
+    def __init__(
+        self,
+        path: Path = DEFAULT_JOURNAL_PATH,
+        resume: bool = False,
+        settings: Optional[Dict[str, Any]] = None,
+    ):
+        self.path = Path(path)
+        # Compared as they read back from the journal
+        self.settings = json.loads(json.dumps(settings or {}))
+        self.completed: Dict[StackSpec, StackOutcome] = {}
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if resume and self.path.exists():
+            self._load()
+        else:
+            self.path.write_text("")
+            self._append({"event": "run", "settings": self.settings})
+
+    def record_test(self, spec: StackSpec, result: Dict[str, Any]) -> None:
+        self._append({"event": "test", "stack": asdict(spec), "result": result})
+
+    def record_stack(self, outcome: StackOutcome) -> None:
+        self._append(
+            {
+                "event": "stack",
+                "stack": asdict(outcome.spec),
+                "success": outcome.success,
+                "results": outcome.results,
+                "elapsed": outcome.elapsed,
+                "error": outcome.error,
+                "timings": outcome.timings,
+            }
+        )
+
+    def _append(self, entry: Dict[str, Any]) -> None:
+        line = json.dumps(entry) + "\n"
+        with self._lock:
+            with open(self.path, "a") as file:
+                file.write(line)
+                file.flush()
+                os.fsync(file.fileno())
+
+    def _load(self) -> None:
+        settings = None
+        with open(self.path) as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # The process died while writing this line
+                    continue
+                if entry["event"] == "run":
+                    settings = entry["settings"]
+                if entry["event"] != "stack":
+                    continue
+
+                spec = StackSpec(**entry["stack"])
+                if entry["error"] is not None:
+                    self.completed.pop(spec, None)
+                    continue
+                self.completed[spec] = StackOutcome(
+                    spec=spec,
+                    success=entry["success"],
+                    results=entry["results"],
+                    elapsed=entry["elapsed"],
+                    timings=entry["timings"],
+                )
+
+        if settings != self.settings:
+            raise ValueError(
+                f"{self.path} was written by a run with other settings "
+                f"({settings or 'unknown'}), it can't be resumed with {self.settings}"
+            )
+
+
+def stacks_from_database() -> List[StackSpec]:
+    """Enumerate every compatible stack listed in database/*.yml."""
+    loader = Loader(warn_on_error=True)
+    loader.load_data()
+
+    specs = []
+    for stack in loader.get_valid_stacks():
+        # TODO: handle catalog-free stacks
+        if stack.catalog is None:
+            continue
+        spec = StackSpec(stack.storage.key, stack.catalog.key, stack.query_engine.key)
+        # Stacks reachable through several interfaces are only run once
+        if spec not in specs:
+            specs.append(spec)
+    return specs
+
+
+def group_by_shared_prefix(specs: List[StackSpec]) -> List[List[StackSpec]]:
+    """Group stacks that share a storage + catalog so they can reuse one
+    warm storage and catalog, cycling only the query engines."""
+    groups: Dict[tuple, List[StackSpec]] = {}
+    for spec in specs:
+        groups.setdefault((spec.storage, spec.catalog), []).append(spec)
+    return list(groups.values())
+
+
+class MatrixRunner:
+    """Runs many groups of stacks at once, bounded by a concurrency limit.
+
+    Every group gets its own TestContext, so groups are independent and the
+    wall time of a run is set by the slowest group rather than the sum. The
+    stacks within a group share a storage + catalog and run one after the
+    other.
+
+    Components in `exclusive`, as (role, name) pairs, create account-wide
+    resources under fixed names, so groups using the same one of them run
+    one at a time: each holds a lock per exclusive component it uses."""
+
+    def __init__(
+        self,
+        run_group: Callable[[List[StackSpec]], List[StackOutcome]],
+        concurrency: int,
+        exclusive: Iterable[Tuple[str, str]] = (),
+    ):
+        self.run_group = run_group
+        self.concurrency = max(1, concurrency)
+        self._locks = {component: threading.Lock() for component in exclusive}
+
+    def run(self, groups: List[List[StackSpec]]) -> List[StackOutcome]:
+        outcomes = {}
+        with ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix="stack"
+        ) as executor:
+            futures = [executor.submit(self._run_one, group) for group in groups]
+            for future in as_completed(futures):
+                for outcome in future.result():
+                    outcomes[outcome.spec] = outcome
+                    logger.info(
+                        f"{'✅' if outcome.success else '❌'} {outcome.spec.label} "
+                        f"finished in {outcome.elapsed:.1f}s"
+                    )
+
+        # Report in the order the stacks were requested
+        return [outcomes[spec] for group in groups for spec in group]
+
+    def _run_one(self, group: List[StackSpec]) -> List[StackOutcome]:
+        # Name the worker thread after the stack so interleaved logs stay readable
+        threading.current_thread().name = (
+            group[0].label
+            if len(group) == 1
+            else f"{group[0].storage}/{group[0].catalog}/*"
+        )
+        start = time.monotonic()
+        try:
+            with self._exclusive(group):
+                return self.run_group(group)
+        except Exception as e:
+            elapsed = (time.monotonic() - start) / len(group)
+            logger.error(
+                f"❌ {threading.current_thread().name}: {str(e)}", exc_info=True
+            )
+            return [
+                StackOutcome(spec=spec, success=False, elapsed=elapsed, error=str(e))
+                for spec in group
+            ]
+
+    def _exclusive(self, group: List[StackSpec]) -> ExitStack:
+        """Take the locks of the exclusive components the group uses, always
+        in the same order so two groups can't deadlock."""
+        components = sorted(
+            {
+                component
+                for spec in group
+                for component in asdict(spec).items()
+                if component in self._locks
+            }
+        )
+        stack = ExitStack()
+        for role, name in components:
+            lock = self._locks[(role, name)]
+            if not lock.acquire(blocking=False):
+                logger.info(f"Waiting for another stack to finish with {role} {name}")
+                lock.acquire()
+            stack.callback(lock.release)
+        return stack
@@ -1,14 +1,38 @@
+import asyncio
 import json
 from os import getenv
 from time import sleep
-from typing import Any, Dict, List
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
 import boto3
+import pyarrow as pa
 import snowflake.connector
 from snowflake.connector import DictCursor
+from snowflake.connector.cursor import SnowflakeCursor
 
 from iceberg_test.catalog.aws_glue import AWSGlueCatalog
 from iceberg_test.storage.s3 import S3Storage
-from ..base import Catalog, QueryEngine, Storage, TestContext
+from ..base import (
+    AsyncQueryEngine,
+    Catalog,
+    Partition,
+    QueryEngine,
+    QueryStats,
+    Storage,
+    TestContext,
+    prefetch,
+)
+
+# Seconds between status checks of a query submitted asynchronously
+POLL_INTERVAL = 0.2
+
+# Times are in milliseconds, the session's history holds its recent queries
+QUERY_HISTORY_SQL = """
+    SELECT query_id, bytes_scanned, compilation_time, execution_time,
+        queued_provisioning_time + queued_repair_time + queued_overload_time,
+        total_elapsed_time
+    FROM TABLE(INFORMATION_SCHEMA.QUERY_HISTORY_BY_SESSION(RESULT_LIMIT => 10000))
+    WHERE query_id IN ({query_ids})
+"""
 
 
 class SnowflakeQueryEngine(QueryEngine):
@@ -16,6 +40,8 @@ class SnowflakeQueryEngine(QueryEngine):
 
     name = "snowflake"  # Used for CLI discovery
     description = "Snowflake SQL query engine"
+    expected_duration = 180.0
+    fixed_names = True
 
     def __init__(self, test_context: TestContext, storage: Storage, catalog: Catalog):
         super().__init__(test_context, storage, catalog)
@@ -28,7 +54,7 @@ class SnowflakeQueryEngine(QueryEngine):
         )
         self.account_id = self.sts_client.get_caller_identity()["Account"]
 
-    def setup(self) -> None:
+    def wire(self) -> None:
         role_policy_statements = []
         if isinstance(self.catalog, AWSGlueCatalog):
             role_policy_statements.append(
@@ -314,7 +340,13 @@ class SnowflakeQueryEngine(QueryEngine):
         cur = self.ctx.cursor().execute(f"DROP ICEBERG TABLE IF EXISTS {test_table};")
         print(f"Dropped table {cur.fetchall()}")
 
-    def execute_query(self, query: str) -> List[List[Any]]:
+    def _execute_query(self, query: str) -> List[List[Any]]:
+        rows, _ = self._execute_query_with_stats(query)
+        return rows
+
+    def _execute_query_with_stats(
+        self, query: str
+    ) -> Tuple[List[List[Any]], QueryStats]:
         cur = self.ctx.cursor()
         try:
             cur.execute(query)
@@ -322,11 +354,82 @@ class SnowflakeQueryEngine(QueryEngine):
             print(f"Error: {str(e)}")
             raise e
 
+        # The rest of the stats are only in the query history
+        stats = QueryStats(query_id=cur.sfqid)
         try:
-            return [list(row) for row in cur.fetchall()]
+            return [list(row) for row in cur.fetchall()], stats
         except:
             # Some queries (like CREATE) don't return results
-            return []
+            return [], stats
+
+    def complete_stats(self, stats: List[QueryStats]) -> None:
+        by_id = {s.query_id: s for s in stats if s.query_id}
+        if not by_id:
+            return
+
+        query_ids = ", ".join(f"'{query_id}'" for query_id in by_id)
+        cur = self.ctx.cursor()
+        cur.execute(QUERY_HISTORY_SQL.format(query_ids=query_ids))
+        for query_id, scanned, compilation, execution, queued, elapsed in cur:
+            s = by_id[query_id]
+            s.bytes_scanned = scanned
+            s.planning_time = compilation / 1000
+            s.wall_time = execution / 1000
+            s.queued_time = queued / 1000
+            s.elapsed_time = elapsed / 1000
+
+    def _stream_query(self, query: str) -> Iterator[pa.RecordBatch]:
+        cur = self.ctx.cursor()
+        try:
+            cur.execute(query)
+            # Result chunks are downloaded as they are consumed
+            for table in cur.fetch_arrow_batches():
+                yield from table.to_batches()
+        finally:
+            cur.close()
 
-    def create_table(self, test_table: str) -> None:
+    def async_engine(self) -> "SnowflakeAsyncQueryEngine":
+        return SnowflakeAsyncQueryEngine(self)
+
+    def create_table(
+        self, test_table: str, partitioning: Optional[List[Partition]] = None
+    ) -> None:
         raise NotImplementedError
+
+
+class SnowflakeAsyncQueryEngine(AsyncQueryEngine):
+    """Submits queries with execute_async and polls their status from the
+    event loop, so a query in flight doesn't hold a thread while it runs."""
+
+    async def _submit(self, query: str) -> SnowflakeCursor:
+        """Run a query to completion, returning a cursor over its results."""
+        ctx = self.engine.ctx
+        cur = ctx.cursor()
+        await self.run_blocking(cur.execute_async, query)
+        while True:
+            status = await self.run_blocking(
+                ctx.get_query_status_throw_if_error, cur.sfqid
+            )
+            if not ctx.is_still_running(status):
+                break
+            await asyncio.sleep(POLL_INTERVAL)
+        await self.run_blocking(cur.get_results_from_sfqid, cur.sfqid)
+        return cur
+
+    async def _execute(self, query: str) -> List[List[Any]]:
+        cur = await self._submit(query)
+        try:
+            return [list(row) for row in await self.run_blocking(cur.fetchall)]
+        finally:
+            cur.close()
+
+    async def _stream(self, query: str, buffer: int) -> AsyncIterator[pa.RecordBatch]:
+        cur = await self._submit(query)
+        batches = (
+            batch for table in cur.fetch_arrow_batches() for batch in table.to_batches()
+        )
+        try:
+            async for batch in self.iterate(prefetch(batches, buffer)):
+                yield batch
+        finally:
+            cur.close()
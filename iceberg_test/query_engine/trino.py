@@ -1,30 +1,158 @@
+from contextlib import contextmanager
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import AsyncIterator, Dict, Any, Iterator, List, Optional, Tuple
+import aiohttp
+import pyarrow as pa
+import queue
+import re
 import tempfile
+import threading
 import shutil
 import trino
+from trino.exceptions import TrinoQueryError
+from trino.mapper import RowMapperFactory
 from os import getenv
 
 from iceberg_test.catalog.aws_glue import AWSGlueCatalog
 from iceberg_test.catalog.snowflake import SnowflakeCatalog
 from iceberg_test.catalog.polaris import PolarisCatalog
-from ..base import QueryEngine, Storage, Catalog, logger, DockerCompose
+from ..base import (
+    AsyncQueryEngine,
+    QueryEngine,
+    QueryStats,
+    Partition,
+    Storage,
+    Catalog,
+    logger,
+    DockerCompose,
+    SqlProbe,
+)
 from iceberg_test.storage.s3 import S3Storage
 from iceberg_test.storage.minio import MinioStorage
 from iceberg_test.storage.azure_storage import AzureADLSStorage
 from iceberg_test.storage.cloudflare_r2 import CloudflareR2
 
+TRINO_IMAGE = "trinodb/trino:469"
+
+# Connections kept open to the coordinator, i.e. queries that can run at once
+POOL_SIZE = 8
+
+# Query IDs looked up per query of the coordinator's history
+HISTORY_BATCH = 500
+
+# Rows per record batch when streaming results
+STREAM_BATCH_ROWS = 10_000
+
+ARROW_TYPES = {
+    "boolean": pa.bool_(),
+    "tinyint": pa.int8(),
+    "smallint": pa.int16(),
+    "integer": pa.int32(),
+    "bigint": pa.int64(),
+    "real": pa.float32(),
+    "double": pa.float64(),
+    "varchar": pa.string(),
+    "char": pa.string(),
+    "date": pa.date32(),
+}
+
+
+def arrow_type(trino_type: str) -> Optional[pa.DataType]:
+    """Arrow type of a Trino column type, None to infer it from the values."""
+    if match := re.fullmatch(r"decimal\((\d+),\s*(\d+)\)", trino_type):
+        return pa.decimal128(int(match[1]), int(match[2]))
+    if trino_type.startswith("timestamp"):
+        return pa.timestamp("us", "UTC" if "with time zone" in trino_type else None)
+    return ARROW_TYPES.get(trino_type.split("(")[0])
+
+
+class TrinoConnectionPool:
+    """Bounded pool of connections to a Trino coordinator.
+
+    Each connection keeps its HTTP session, and the session properties it was
+    opened with, across the queries it runs. Callers check a connection out
+    for one query at a time, waiting when all `size` are in use. Connections
+    are opened as needed."""
+
+    def __init__(
+        self,
+        port: int,
+        size: int = POOL_SIZE,
+        session_properties: Optional[Dict[str, str]] = None,
+    ):
+        self.port = port
+        self.session_properties = session_properties or {}
+        self._slots = threading.BoundedSemaphore(size)
+        # Most recently used first, so the pool reuses warm sessions
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._connections: List[trino.dbapi.Connection] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self) -> Iterator[trino.dbapi.Connection]:
+        with self._slots:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+            try:
+                yield conn
+            finally:
+                self._idle.put(conn)
+
+    def _connect(self) -> trino.dbapi.Connection:
+        conn = trino.dbapi.connect(
+            host="localhost",
+            port=self.port,
+            user="admin",
+            session_properties=dict(self.session_properties),
+        )
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+
+    def close(self) -> None:
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+
 
 class TrinoQueryEngine(QueryEngine):
     """Trino query engine implementation."""
 
     name = "trino"  # Used for CLI discovery
     description = "Trino distributed SQL query engine"
-
-    def setup(self):
+    images = [TRINO_IMAGE]
+    expected_duration = 45.0
+    # Set on every pooled session, e.g. {"query_max_run_time": "10m"}
+    session_properties: Dict[str, str] = {}
+    pool: Optional[TrinoConnectionPool] = None
+
+    @property
+    def port(self) -> int:
+        """Host port of the Trino coordinator"""
+        return self.test_context.ports.get("trino")
+
+    @property
+    def workers(self) -> int:
+        """Worker nodes besides the coordinator. Without any, the coordinator
+        runs queries itself."""
+        return self.test_context.options.get("trino_workers", 0)
+
+    def boot(self):
         self.start_service()
+        self.pool = TrinoConnectionPool(
+            self.port, session_properties=self.session_properties
+        )
+
+    def wire(self):
+        self._create_catalog()
 
     def teardown(self):
+        if self.pool is not None:
+            self.pool.close()
         self.stop_service()
 
     def start_service(self):
@@ -36,10 +164,24 @@ class TrinoQueryEngine(QueryEngine):
         # Write Trino configuration files
         self._write_config_files(trino_config)
 
+        worker_services = ""
+        for index in range(self.workers):
+            worker = f"trino-worker-{index}"
+            worker_config = self.config_dir / "config" / worker
+            worker_config.mkdir(parents=True)
+            self._write_config_files(worker_config, node_id=worker, coordinator=False)
+            worker_services += f"""
+    {worker}:
+        image: {TRINO_IMAGE}
+        volumes: [ '{str(self.config_dir)}/config/{worker}:/etc/trino' ]
+        networks:
+            - {self.test_context.docker_network_name}
+"""
+
         docker_compose_yaml = f"""
-services:
+services:{worker_services}
     trino:
-        image: trinodb/trino:469
+        image: {TRINO_IMAGE}
         volumes: [ '{str(self.config_dir)}/config/trino:/etc/trino' ]
         healthcheck:
             test: ['CMD', 'curl', '-f', 'http://localhost:8080/v1/status']
@@ -49,45 +191,70 @@ services:
         networks:
             - {self.test_context.docker_network_name}
         ports:
-            - "8081:8080"
+            - "{self.port}:8080"
 
 networks:
     {self.test_context.docker_network_name}:
         external: true
 """
-        self.docker_compose = DockerCompose(docker_compose_yaml)
+        self.docker_compose = DockerCompose(
+            docker_compose_yaml,
+            self.test_context.compose_project_name,
+            # Trino answers HTTP well before it accepts queries, and accepts
+            # them before every worker has announced itself
+            probes=[
+                SqlProbe(
+                    "trino",
+                    self._ping,
+                    query="SELECT count(*) FROM system.runtime.nodes "
+                    "WHERE state = 'active'",
+                    ready=lambda rows: rows[0][0] >= self.workers + 1,
+                )
+            ],
+            timings=self.timings,
+        )
         self.docker_compose.start()
-        self._create_catalog()
 
     def stop_service(self):
         if self.config_dir:
             shutil.rmtree(self.config_dir)
         self.docker_compose.stop()
 
-    def _write_config_files(self, config_dir: Path) -> None:
-        """Write all required Trino configuration files."""
+    def _write_config_files(
+        self, config_dir: Path, node_id: str = "local", coordinator: bool = True
+    ) -> None:
+        """Write all required Trino configuration files of one node."""
         # Create catalog directory
         catalog_dir = config_dir / "catalog"
         catalog_dir.mkdir()
 
         # Write node.properties
-        node_properties = """
+        node_properties = f"""
 node.environment=docker
-node.id=local
+node.id={node_id}
 node.data-dir=/data/trino
 """.strip()
 
         (config_dir / "node.properties").write_text(node_properties)
 
-        # Write config.properties
-        config_properties = """
+        # Write config.properties. Catalogs are created on the coordinator,
+        # which hands their properties to the workers
+        if coordinator:
+            config_properties = f"""
 coordinator=true
-node-scheduler.include-coordinator=true
+node-scheduler.include-coordinator={str(not self.workers).lower()}
 http-server.http.port=8080
 discovery.uri=http://localhost:8080
 web-ui.preview.enabled=true
 catalog.management=dynamic
 catalog.store=memory
+""".strip()
+        else:
+            config_properties = """
+coordinator=false
+http-server.http.port=8080
+discovery.uri=http://trino:8080
+catalog.management=dynamic
 """.strip()
 
         (config_dir / "config.properties").write_text(config_properties)
@@ -292,15 +459,17 @@ catalog.store=memory
         self.execute_query(create_catalog_sql)
         logger.info("Successfully created Iceberg catalog in Trino")
 
-    def execute_query(self, query: str) -> List[List[Any]]:
+    def _execute_query(self, query: str) -> List[List[Any]]:
         """Execute a SQL query against Trino."""
+        rows, _ = self._execute_query_with_stats(query)
+        return rows
+
+    def _execute_query_with_stats(
+        self, query: str
+    ) -> Tuple[List[List[Any]], QueryStats]:
         logger.info(f"Executing query: {query}")
 
-        with trino.dbapi.connect(
-            host="localhost",
-            port=8081,
-            user="admin",
-        ) as conn:
+        with self.pool.connection() as conn:
             cur = conn.cursor()
             try:
                 cur.execute(query)
@@ -309,10 +478,80 @@ catalog.store=memory
                 raise e
 
             try:
-                return [list(row) for row in cur.fetchall()]
+                rows = [list(row) for row in cur.fetchall()]
             except:
                 # Some queries (like CREATE) don't return results
-                return []
+                rows = []
+            # Final statistics of the query, complete once all rows are fetched
+            return rows, self._query_stats(cur.query_id, cur.stats)
+
+    @staticmethod
+    def _query_stats(query_id: str, stats: Dict[str, Any]) -> QueryStats:
+        def seconds(key: str) -> Optional[float]:
+            return stats[key] / 1000 if key in stats else None
+
+        return QueryStats(
+            query_id=query_id,
+            rows_scanned=stats.get("processedRows"),
+            bytes_scanned=stats.get("physicalInputBytes"),
+            splits=stats.get("totalSplits"),
+            queued_time=seconds("queuedTimeMillis"),
+            cpu_time=seconds("cpuTimeMillis"),
+            wall_time=seconds("wallTimeMillis"),
+            elapsed_time=seconds("elapsedTimeMillis"),
+            peak_memory_bytes=stats.get("peakMemoryBytes"),
+        )
+
+    def complete_stats(self, stats: List[QueryStats]) -> None:
+        """Planning times aren't in the client protocol, they come from the
+        coordinator's recent query history."""
+        by_id = {s.query_id: s for s in stats if s.query_id}
+        ids = list(by_id)
+        for start in range(0, len(ids), HISTORY_BATCH):
+            batch = ids[start : start + HISTORY_BATCH]
+            quoted = ", ".join(f"'{query_id}'" for query_id in batch)
+            history = self._execute_query(
+                f"""
+                SELECT query_id, analysis_time_ms, planning_time_ms
+                FROM system.runtime.queries
+                WHERE query_id IN ({quoted})
+                """
+            )
+            for query_id, analysis_time, planning_time in history:
+                by_id[query_id].planning_time = (
+                    (analysis_time or 0) + (planning_time or 0)
+                ) / 1000
+
+    def _stream_query(self, query: str) -> Iterator[pa.RecordBatch]:
+        logger.info(f"Streaming query: {query}")
+
+        with self.pool.connection() as conn:
+            cur = conn.cursor()
+            try:
+                cur.execute(query)
+                while rows := cur.fetchmany(STREAM_BATCH_ROWS):
+                    columns = list(zip(*rows))
+                    yield pa.RecordBatch.from_arrays(
+                        [
+                            pa.array(values, type=arrow_type(column[1]))
+                            for column, values in zip(cur.description, columns)
+                        ],
+                        names=[column[0] for column in cur.description],
+                    )
+            finally:
+                # Cancels the query if the consumer stopped early
+                cur.close()
+
+    def async_engine(self) -> "TrinoAsyncQueryEngine":
+        return TrinoAsyncQueryEngine(self)
+
+    def _ping(self, query: str) -> List[List[Any]]:
+        """Run a query without logging it, for readiness probes. Runs before
+        the pool exists, on a connection of its own."""
+        with trino.dbapi.connect(host="localhost", port=self.port, user="admin") as conn:
+            cur = conn.cursor()
+            cur.execute(query)
+            return cur.fetchall()
 
     def link_table(self, test_table: str) -> None:
         pass
@@ -320,8 +559,9 @@ catalog.store=memory
     def unlink_table(self, test_table: str) -> None:
         pass
 
-    # TODO partitioned by
-    def create_table(self, test_table: str) -> None:
+    def create_table(
+        self, test_table: str, partitioning: Optional[List[Partition]] = None
+    ) -> None:
         """Test creating a table with Iceberg schema."""
         create_table_sql = f"""
         CREATE TABLE {test_table} (
@@ -332,5 +572,120 @@ catalog.store=memory
             status VARCHAR
         )
         """
+        if partitioning:
+            fields = ", ".join(
+                f"'{self._partition_sql(partition)}'" for partition in partitioning
+            )
+            create_table_sql += f"WITH (partitioning = ARRAY[{fields}])"
         # TODO: try to list tables, columns
         self.execute_query(create_table_sql)
+
+    @staticmethod
+    def _partition_sql(partition: Partition) -> str:
+        if partition.transform == "identity":
+            return partition.column
+        arguments = partition.column
+        if partition.parameter is not None:
+            arguments += f", {partition.parameter}"
+        return f"{partition.transform}({arguments})"
+
+    def compact_table(self, test_table: str) -> None:
+        self.execute_query(f"ALTER TABLE {test_table} EXECUTE optimize")
+
+    def version_as_of(self, test_table: str, snapshot_id: int) -> str:
+        return f"{test_table} FOR VERSION AS OF {snapshot_id}"
+
+    def timestamp_as_of(self, test_table: str, timestamp: datetime) -> str:
+        timestamp = timestamp.astimezone(timezone.utc)
+        milliseconds = timestamp.microsecond // 1000
+        return (
+            f"{test_table} FOR TIMESTAMP AS OF "
+            f"TIMESTAMP '{timestamp:%Y-%m-%d %H:%M:%S}.{milliseconds:03d} UTC'"
+        )
+
+
+class TrinoAsyncQueryEngine(AsyncQueryEngine):
+    """Submits queries over Trino's HTTP protocol with aiohttp, so a query in
+    flight costs a pending request rather than a thread. At most `max_queries`
+    requests are open at once."""
+
+    def __init__(self, engine: TrinoQueryEngine, max_queries: int = 256):
+        super().__init__(engine)
+        self.max_queries = max_queries
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def session(self) -> aiohttp.ClientSession:
+        # Created lazily, since it must be created inside the event loop
+        if self._session is None:
+            headers = {"X-Trino-User": "admin"}
+            if self.engine.session_properties:
+                headers["X-Trino-Session"] = ",".join(
+                    f"{name}={value}"
+                    for name, value in self.engine.session_properties.items()
+                )
+            self._session = aiohttp.ClientSession(
+                headers=headers,
+                connector=aiohttp.TCPConnector(limit=self.max_queries),
+            )
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+        await super().close()
+
+    async def _execute(self, query: str) -> List[List[Any]]:
+        rows = []
+        async for columns, data in self._pages(query):
+            rows.extend(list(row) for row in self._map_rows(columns, data))
+        return rows
+
+    async def _stream(self, query: str, buffer: int) -> AsyncIterator[pa.RecordBatch]:
+        # Pages are fetched as the consumer asks for them, so nothing is
+        # buffered beyond the page being converted
+        async for columns, data in self._pages(query):
+            values = list(zip(*self._map_rows(columns, data)))
+            yield pa.RecordBatch.from_arrays(
+                [
+                    pa.array(column_values, type=arrow_type(column["type"]))
+                    for column, column_values in zip(columns, values)
+                ],
+                names=[column["name"] for column in columns],
+            )
+
+    @staticmethod
+    def _map_rows(columns: List[Dict], data: List[List]) -> List[List[Any]]:
+        """Convert rows from their JSON encoding to Python values, as the dbapi
+        client does."""
+        mapper = RowMapperFactory().create(
+            columns=columns, legacy_primitive_types=False
+        )
+        return mapper.map(data)
+
+    async def _pages(
+        self, query: str
+    ) -> AsyncIterator[Tuple[List[Dict], List[List]]]:
+        """Follow a query's nextUri chain, yielding its columns and each page of
+        rows. Cancels the query if the consumer stops early."""
+        session = self.session()
+        async with session.post(
+            f"http://localhost:{self.engine.port}/v1/statement", data=query.encode()
+        ) as response:
+            response.raise_for_status()
+            result = await response.json()
+
+        try:
+            while True:
+                if "error" in result:
+                    raise TrinoQueryError(result["error"], result.get("id"))
+                if result.get("data"):
+                    yield result["columns"], result["data"]
+                if "nextUri" not in result:
+                    return
+                async with session.get(result["nextUri"]) as response:
+                    response.raise_for_status()
+                    result = await response.json()
+        finally:
+            if "nextUri" in result:
+                async with session.delete(result["nextUri"]):
+                    pass
@@ -0,0 +1,156 @@
+from dataclasses import dataclass
+from pathlib import Path
+from statistics import median
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import heapq
+
+import yaml
+
+from .matrix import StackSpec
+
+RESULTS_PATH = Path("database/results.yml")
+
+# Only the most recent runs count, older ones predate image or suite changes
+HISTORY_DEPTH = 5
+
+ROLES = ("storage", "catalog", "query_engine")
+
+
+@dataclass
+class ScheduledGroup:
+    """A group of stacks with its predicted place in the schedule."""
+
+    specs: List[StackSpec]
+    estimate: float
+    slot: int
+    start: float
+
+    @property
+    def end(self) -> float:
+        return self.start + self.estimate
+
+
+class DurationEstimator:
+    """Predicts how long a stack takes to run.
+
+    Prefers the recorded durations of the stack itself, then the recorded
+    lifecycle timings of its components, and finally the `expected_duration`
+    default of each component, looked up through `default_for(role, name)`.
+    Only runs of the same suite, at the same scale factor and with the same
+    benchmark settings are taken into account."""
+
+    def __init__(
+        self,
+        history: List[Dict[str, Any]],
+        default_for: Callable[[str, str], float],
+        suite: str = "sql",
+        scale_factor: float = 0,
+        benchmark: Optional[Dict[str, int]] = None,
+    ):
+        self.default_for = default_for
+        self.suite = suite
+        self.scale_factor = scale_factor
+        self.benchmark = benchmark
+        self._stacks: Dict[StackSpec, List[float]] = {}
+        self._components: Dict[Tuple[str, str], List[float]] = {}
+        # Newest records come first
+        for record in history:
+            self._add(record)
+
+    @classmethod
+    def from_results(
+        cls,
+        default_for: Callable[[str, str], float],
+        suite: str = "sql",
+        scale_factor: float = 0,
+        benchmark: Optional[Dict[str, int]] = None,
+        path: Path = RESULTS_PATH,
+    ) -> "DurationEstimator":
+        with open(path) as file:
+            history = yaml.safe_load(file)["results"]
+        return cls(
+            history,
+            default_for,
+            suite=suite,
+            scale_factor=scale_factor,
+            benchmark=benchmark,
+        )
+
+    def _add(self, record: Dict[str, Any]) -> None:
+        results = record.get("results") or {}
+        if record.get("catalog") is None:
+            return
+        if results.get("suite", "sql") != self.suite:
+            return
+        if results.get("scale_factor", 0) != self.scale_factor:
+            return
+        if results.get("benchmark") != self.benchmark:
+            return
+
+        spec = StackSpec(record["storage"], record["catalog"], record["query_engine"])
+        if "duration" in results:
+            self._stacks.setdefault(spec, []).append(results["duration"])
+
+        for role, phases in (results.get("timings") or {}).items():
+            # Components started by a ComponentPipeline record boot and wire
+            # rather than setup
+            if "setup" in phases:
+                seconds = phases["setup"]
+            else:
+                seconds = phases.get("boot", 0.0) + phases.get("wire", 0.0)
+            seconds += phases.get("teardown", 0.0)
+            if role == "query_engine":
+                # The suite's time depends on the engine running it
+                tests = results.get("tests", [])
+                seconds += sum(test.get("duration", 0.0) for test in tests)
+            self._components.setdefault((role, record[role]), []).append(seconds)
+
+    def component(self, role: str, name: str) -> float:
+        samples = self._components.get((role, name))
+        if samples:
+            return median(samples[:HISTORY_DEPTH])
+        return self.default_for(role, name)
+
+    def stack(self, spec: StackSpec) -> float:
+        samples = self._stacks.get(spec)
+        if samples:
+            return median(samples[:HISTORY_DEPTH])
+        return sum(self.component(role, getattr(spec, role)) for role in ROLES)
+
+    def group(self, specs: List[StackSpec]) -> float:
+        """Stacks in a group share one storage + catalog, so that is only paid
+        once."""
+        shared = self.component("storage", specs[0].storage) + self.component(
+            "catalog", specs[0].catalog
+        )
+        stacks = [self.stack(spec) for spec in specs]
+        return max(max(stacks), sum(stacks) - shared * (len(specs) - 1))
+
+
+def schedule(
+    groups: List[List[StackSpec]], concurrency: int, estimator: DurationEstimator
+) -> List[ScheduledGroup]:
+    """Order groups longest first and simulate handing each to whichever of the
+    `concurrency` slots frees up first. Starting the long stacks early keeps one
+    slow stack from dragging on alone at the end of a run."""
+    estimates = sorted(
+        ((estimator.group(group), group) for group in groups),
+        key=lambda item: item[0],
+        reverse=True,
+    )
+
+    # (time the slot frees up, slot)
+    slots = [(0.0, slot) for slot in range(max(1, concurrency))]
+    heapq.heapify(slots)
+
+    planned = []
+    for estimate, group in estimates:
+        start, slot = heapq.heappop(slots)
+        planned.append(ScheduledGroup(group, estimate, slot, start))
+        heapq.heappush(slots, (start + estimate, slot))
+    return planned
+
+
+def makespan(planned: List[ScheduledGroup]) -> float:
+    """Predicted wall time of the whole schedule."""
+    return max((group.end for group in planned), default=0.0)
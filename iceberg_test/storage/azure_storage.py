@@ -8,6 +8,7 @@ from azure.storage.blob import BlobServiceClient
 class AzureADLSStorage(Storage):
     name = "azure_adls"
     description = "Is it deprecated or is it experimental?"
+    expected_duration = 10.0
 
     @property
     def container_name(self) -> str:
@@ -50,7 +51,7 @@ class AzureADLSStorage(Storage):
             "adls.client-secret": self.azure_client_secret,
         }
 
-    def setup(self):
+    def boot(self):
         azure_client = self._blob_service_client()
         container_client = azure_client.get_container_client(self.container_name)
         container_client.create_container()
@@ -9,6 +9,7 @@ class CloudflareR2(Storage):
 
     name = "cloudflare_r2"
     description = "Cloudflare R2, Cloudflare's S3-compatible object storage"
+    expected_duration = 10.0
 
     @property
     def s3_endpoint(self):
@@ -43,7 +44,7 @@ class CloudflareR2(Storage):
     def account_id(self) -> str:
         return os.environ["CF_R2_ACCOUNT_ID"]
 
-    def setup(self):
+    def boot(self):
         s3_client = boto3.client(
             "s3",
             endpoint_url=self.s3_endpoint,
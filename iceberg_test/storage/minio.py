@@ -1,15 +1,19 @@
 import boto3
-from ..base import Storage, DockerCompose, logger
+from ..base import Storage, DockerCompose, HttpProbe, NGROK_IMAGE, logger
 from typing import Dict, Any
 import subprocess
 from os import getenv
 
+MINIO_IMAGE = "minio/minio:RELEASE.2025-02-03T21-03-04Z"
+
 
 class MinioStorage(Storage):
     """MinIO storage implementation."""
 
     name = "minio"  # Used for CLI discovery
     description = "MinIO S3-compatible object storage"
+    images = [MINIO_IMAGE, NGROK_IMAGE]
+    expected_duration = 15.0
 
     # TODO: some of these properties should be pushed down to the base class
 
@@ -26,6 +30,15 @@ class MinioStorage(Storage):
         """The URL for the storage bucket"""
         return f"s3://{self.bucket_name}"
 
+    @property
+    def s3_port(self) -> int:
+        """Host port of the MinIO S3 API"""
+        return self.test_context.ports.get("minio")
+
+    @property
+    def console_port(self) -> int:
+        return self.test_context.ports.get("minio_console")
+
     @property
     def aws_access_key_id(self):
         return "minioadmin"
@@ -41,8 +54,10 @@ class MinioStorage(Storage):
             "s3.secret-access-key": self.aws_secret_access_key,
         }
 
-    def setup(self):
+    def boot(self):
         self.start_service()
+
+    def wire(self):
         self.create_bucket()
 
     def teardown(self):
@@ -54,7 +69,7 @@ class MinioStorage(Storage):
         docker_compose_yaml = f"""
 services:
     minio:
-        image: minio/minio:RELEASE.2025-02-03T21-03-04Z
+        image: {MINIO_IMAGE}
         environment:
             - MINIO_ROOT_USER={self.aws_access_key_id}
             - MINIO_ROOT_PASSWORD={self.aws_secret_access_key}
@@ -68,28 +83,39 @@ services:
         networks:
             - {self.test_context.docker_network_name}
         ports:
-            - "9000:9000"
-            - "9001:9001"
+            - "{self.s3_port}:9000"
+            - "{self.console_port}:9001"
 
     minio_ngrok:
-        image: ngrok/ngrok:3.19.0-alpine
+        image: {NGROK_IMAGE}
         environment:
             NGROK_AUTHTOKEN: "{getenv('NGROK_AUTHTOKEN')}"
         command:
             - "http"
-            - "http://host.docker.internal:9000"
+            - "http://host.docker.internal:{self.s3_port}"
             - "--domain"
             - "hack25minio-{self.test_context.test_run_name}.ngrok.io"
         networks:
             - {self.test_context.docker_network_name}
         ports:
-          - "4041:4040"
+          - "{self.test_context.ports.get('minio_ngrok')}:4040"
 
 networks:
     {self.test_context.docker_network_name}:
         external: true
 """
-        self.docker_compose = DockerCompose(docker_compose_yaml)
+        self.docker_compose = DockerCompose(
+            docker_compose_yaml,
+            self.test_context.compose_project_name,
+            probes=[
+                HttpProbe(
+                    "minio", f"http://localhost:{self.s3_port}/minio/health/ready"
+                ),
+                # The bucket is created through the tunnel, so wait for it too
+                HttpProbe("minio_ngrok", f"{self.s3_endpoint}/minio/health/live"),
+            ],
+            timings=self.timings,
+        )
         self.docker_compose.start()
 
     def stop_service(self):
@@ -9,6 +9,7 @@ class S3Storage(Storage):
 
     name = "s3"
     description = "The Simple Storage Service"
+    expected_duration = 10.0
 
     @property
     def s3_endpoint(self):
@@ -38,7 +39,7 @@ class S3Storage(Storage):
     def aws_secret_access_key(self) -> str:
         return os.environ["AWS_SECRET_ACCESS_KEY"]
 
-    def setup(self):
+    def boot(self):
         s3_client = boto3.client("s3")
         s3_client.create_bucket(Bucket=self.bucket_name)
 
@@ -0,0 +1,173 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+import functools
+import random
+import threading
+import time
+import pyarrow as pa
+from pyiceberg.exceptions import CommitFailedException
+from pyiceberg.table import Table
+
+from .suite import TestSuite
+from ..benchmark import LatencyBenchmark, summarize
+from ..base import Catalog, QueryEngine, Storage
+
+COMMITS_SCHEMA = pa.schema([("writer", pa.int32()), ("sequence", pa.int64())])
+
+# Numbers of concurrent writers to measure, and commits made by each
+DEFAULT_WRITERS = "1,2,4,8"
+DEFAULT_COMMITS = 20
+
+# A conflicting commit is retried on fresh metadata after a random backoff,
+# up to MAX_RETRIES times
+MAX_RETRIES = 10
+BACKOFF = 0.05
+
+
+@dataclass
+class WriterOutcome:
+    # Latency of each successful commit, retries included
+    latencies: List[float] = field(default_factory=list)
+    conflicts: int = 0
+    # Commits abandoned after MAX_RETRIES retries
+    failed: int = 0
+
+
+class CommitStressSuite(TestSuite):
+    """How the catalog's optimistic concurrency holds up under contention.
+
+    For each number of writers, that many threads append one row per commit
+    to the same table, each through its own pyiceberg client, retrying
+    commits that lose a race. Records commits per second, conflicts, retries
+    and commit latency percentiles as metrics, then checks that the engine
+    sees every committed row.
+
+    Writer counts are set with `--suite-option writers=1,2,4,8` and commits
+    per writer with `--suite-option commits=20`."""
+
+    name = "commits"
+    description = "Concurrent writer commit stress suite"
+
+    def __init__(
+        self,
+        storage: Storage,
+        catalog: Catalog,
+        query_engine: QueryEngine,
+        namespace: Optional[str] = None,
+        scale_factor: float = 0,
+        benchmark: Optional[LatencyBenchmark] = None,
+        options: Optional[Dict[str, str]] = None,
+    ):
+        super().__init__(
+            storage,
+            catalog,
+            query_engine,
+            namespace,
+            scale_factor,
+            benchmark,
+            options,
+        )
+
+        levels = self.options.get("writers", DEFAULT_WRITERS)
+        self.levels = sorted({int(n) for n in levels.split(",")})
+        self.commits = int(self.options.get("commits", DEFAULT_COMMITS))
+        self.tests = (
+            ["test_create_table"]
+            + [f"writers_{n}" for n in self.levels]
+            + ["test_drop_table"]
+        )
+
+        self.test_name = self.table_name("commits")
+        self.test_table = f"{self.test_schema}.{self.test_name}"
+        self.identifier = f"{self.catalog.catalog_name}.{self.test_name}"
+        self.rows_committed = 0
+
+    def run_test(self, test: str) -> None:
+        if test.startswith("writers_"):
+            self.run_writers(int(test.removeprefix("writers_")))
+        else:
+            super().run_test(test)
+
+    def test_create_table(self):
+        catalog = self.iceberg_catalog()
+        catalog.create_table(
+            self.identifier,
+            schema=COMMITS_SCHEMA,
+            location=f"{self.storage.bucket_url}/{self.catalog.catalog_name}/{self.test_name}",
+        )
+        self.query_engine.link_table(self.test_table)
+
+    def run_writers(self, writers: int):
+        # Each writer's table is loaded by a client of its own up front, so a
+        # writer can't fail before the others wait for it at the barrier
+        tables = [
+            self.iceberg_catalog().load_table(self.identifier) for _ in range(writers)
+        ]
+        barrier = threading.Barrier(writers)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(
+            max_workers=writers,
+            thread_name_prefix=threading.current_thread().name,
+        ) as executor:
+            outcomes = list(
+                executor.map(
+                    functools.partial(self.write, barrier), range(writers), tables
+                )
+            )
+        elapsed = time.perf_counter() - start
+
+        latencies = [latency for outcome in outcomes for latency in outcome.latencies]
+        conflicts = sum(outcome.conflicts for outcome in outcomes)
+        failed = sum(outcome.failed for outcome in outcomes)
+        self.rows_committed += len(latencies)
+        self.record_metrics(
+            writers=writers,
+            commits=len(latencies),
+            commits_per_second=round(len(latencies) / elapsed, 2),
+            conflicts=conflicts,
+            retries=conflicts - failed,
+            failed=failed,
+            **{f"commit_{name}": value for name, value in summarize(latencies).items()},
+        )
+
+        assert not failed, f"{failed} commits gave up after {MAX_RETRIES} retries"
+        [[count]] = self.query_engine.execute_query(
+            f"SELECT COUNT(*) FROM {self.test_table}"
+        )
+        assert (
+            count == self.rows_committed
+        ), f"Expected {self.rows_committed} committed rows, got {count}"
+
+    def write(
+        self, barrier: threading.Barrier, writer: int, table: Table
+    ) -> WriterOutcome:
+        """Commit one row at a time to `table`, loaded by a client of its own."""
+        outcome = WriterOutcome()
+        # Start committing together, so the writers contend from the start
+        barrier.wait()
+
+        for sequence in range(self.commits):
+            rows = pa.table(
+                {"writer": [writer], "sequence": [sequence]}, schema=COMMITS_SCHEMA
+            )
+            start = time.perf_counter()
+            for attempt in range(MAX_RETRIES + 1):
+                try:
+                    table.append(rows)
+                    outcome.latencies.append(time.perf_counter() - start)
+                    break
+                except CommitFailedException:
+                    outcome.conflicts += 1
+                    if attempt == MAX_RETRIES:
+                        outcome.failed += 1
+                        break
+                    time.sleep(random.uniform(0, BACKOFF * 2**attempt))
+                    table.refresh()
+        return outcome
+
+    def test_drop_table(self):
+        self.query_engine.unlink_table(self.test_table)
+
+        catalog = self.iceberg_catalog()
+        catalog.drop_table(self.identifier)
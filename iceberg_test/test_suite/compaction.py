@@ -0,0 +1,164 @@
+from typing import Dict, Optional, Tuple
+import math
+import time
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from .data import (
+    CUSTOMER_ORDERS_SCHEMA,
+    FIRST_GENERATED_ORDER_ID,
+    ROWS_PER_SCALE_FACTOR,
+    CustomerOrders,
+)
+from .fingerprint import table_fingerprints
+from .suite import TestSuite
+from ..benchmark import LatencyBenchmark
+from ..base import Catalog, QueryEngine, Storage
+
+# Number of appends the generated orders are split into
+DEFAULT_FILES = 1000
+
+# Share of the generated orders the filtered scan selects
+FILTERED_FRACTION = 0.01
+
+FILTERED_SCAN_SQL = """
+    SELECT COUNT(*), SUM(total_amount)
+    FROM {table}
+    WHERE order_id BETWEEN {low} AND {high}
+"""
+
+
+class CompactionSuite(TestSuite):
+    """How scans degrade with many small files, and what compaction recovers.
+
+    Writes the `customer_orders` table through pyiceberg the way a streaming
+    writer would, one small commit per batch, then times a full scan and a
+    filtered scan on the engine before and after the engine compacts the
+    table. Each test records the table's data file count and its latencies as
+    metrics.
+
+    `--scale-factor` sets the number of orders (default 0.1, 100k) and
+    `--suite-option files=...` how many appends they are split into."""
+
+    name = "compaction"
+    description = "Small file compaction suite"
+    tests = [
+        "test_create_table",
+        "test_append_small_files",
+        "test_scan_small_files",
+        "test_compact_table",
+        "test_scan_compacted",
+        "test_drop_table",
+    ]
+
+    def __init__(
+        self,
+        storage: Storage,
+        catalog: Catalog,
+        query_engine: QueryEngine,
+        namespace: Optional[str] = None,
+        scale_factor: float = 0,
+        benchmark: Optional[LatencyBenchmark] = None,
+        options: Optional[Dict[str, str]] = None,
+    ):
+        super().__init__(
+            storage,
+            catalog,
+            query_engine,
+            namespace,
+            scale_factor or 0.1,
+            benchmark,
+            options,
+        )
+
+        rows = int(self.scale_factor * ROWS_PER_SCALE_FACTOR)
+        files = int(self.options.get("files", DEFAULT_FILES))
+        self.orders = CustomerOrders(
+            self.scale_factor, batch_size=max(1, math.ceil(rows / files))
+        )
+        # A slice from the middle of the generated order IDs
+        selected = max(1, int(rows * FILTERED_FRACTION))
+        self.filter_range = (
+            FIRST_GENERATED_ORDER_ID + (rows - selected) // 2,
+            FIRST_GENERATED_ORDER_ID + (rows - selected) // 2 + selected - 1,
+        )
+
+        self.test_name = self.table_name("customer_orders_small_files")
+        self.test_table = f"{self.test_schema}.{self.test_name}"
+        self.identifier = f"{self.catalog.catalog_name}.{self.test_name}"
+
+    def test_create_table(self):
+        catalog = self.iceberg_catalog()
+        catalog.create_table(
+            self.identifier,
+            schema=CUSTOMER_ORDERS_SCHEMA,
+            location=f"{self.storage.bucket_url}/{self.catalog.catalog_name}/{self.test_name}",
+        )
+
+    def test_append_small_files(self):
+        table = self.iceberg_catalog().load_table(self.identifier)
+        appends = 0
+        start = time.perf_counter()
+        # One commit per batch, like a streaming writer
+        for batch in self.orders.batches():
+            table.append(pa.Table.from_batches([batch]))
+            appends += 1
+        self.record_metrics(
+            appends=appends,
+            append_duration=round(time.perf_counter() - start, 4),
+            data_files=self.data_files(),
+        )
+
+        self.query_engine.link_table(self.test_table)
+
+    def test_scan_small_files(self):
+        self.scan()
+
+    def test_compact_table(self):
+        start = time.perf_counter()
+        self.query_engine.compact_table(self.test_table)
+        self.record_metrics(
+            compaction=round(time.perf_counter() - start, 4),
+            data_files=self.data_files(),
+        )
+
+    def test_scan_compacted(self):
+        self.scan()
+
+    def test_drop_table(self):
+        self.query_engine.unlink_table(self.test_table)
+
+        catalog = self.iceberg_catalog()
+        catalog.drop_table(self.identifier)
+
+    def scan(self):
+        """Time a full and a filtered scan, checking that both see all the
+        data written."""
+        fingerprints, full_scan = self.sample(
+            lambda: table_fingerprints(self.query_engine.execute_query, self.test_table)
+        )
+        (count, _), filtered_scan = self.sample(self.filtered_scan)
+        self.record_metrics(
+            data_files=self.data_files(),
+            full_scan=round(full_scan, 4),
+            filtered_scan=round(filtered_scan, 4),
+        )
+
+        expected = self.orders.fingerprints()
+        assert fingerprints == expected, f"Expected {expected}, got {fingerprints}"
+        low, high = self.filter_range
+        assert (
+            count == high - low + 1
+        ), f"Filtered scan: expected {high - low + 1} rows, got {count}"
+
+    def filtered_scan(self) -> Tuple[int, float]:
+        low, high = self.filter_range
+        [[count, total]] = self.query_engine.execute_query(
+            FILTERED_SCAN_SQL.format(table=self.test_table, low=low, high=high)
+        )
+        return int(count), total
+
+    def data_files(self) -> int:
+        """Data files in the table's current snapshot, as the catalog sees it."""
+        files = self.iceberg_catalog().load_table(self.identifier).inspect.files()
+        return files.filter(pc.field("content") == 0).num_rows
@@ -0,0 +1,177 @@
+from datetime import date
+from typing import Dict, Iterator, Optional, Tuple
+import numpy as np
+import pyarrow as pa
+
+from .fingerprint import Fingerprint, Row, yyyymmdd
+
+# Rows generated per unit of scale factor
+ROWS_PER_SCALE_FACTOR = 1_000_000
+DEFAULT_BATCH_SIZE = 1_000_000
+
+CUSTOMER_ORDERS_SCHEMA = pa.schema(
+    [
+        ("customer_id", pa.int64()),
+        ("order_id", pa.int64()),
+        ("order_date", pa.date32()),
+        ("total_amount", pa.float64()),
+        ("status", pa.string()),
+    ]
+)
+
+# The hand-written orders the tests modify, present at every scale factor
+SEED_ORDERS = [
+    (1, 1001, date(2024, 1, 1), 10050, "COMPLETED"),
+    (1, 1002, date(2024, 1, 2), 20075, "PENDING"),
+    (2, 1003, date(2024, 1, 3), 15025, "COMPLETED"),
+    (2, 1004, date(2024, 1, 4), 30000, "PENDING"),
+]
+
+STATUSES = ["COMPLETED", "PENDING"]
+FIRST_GENERATED_ORDER_ID = 10_000
+FIRST_GENERATED_CUSTOMER_ID = 10
+CUSTOMERS_PER_SCALE_FACTOR = 100_000
+START_DATE = np.datetime64("2020-01-01", "D")
+DAYS = 5 * 365
+
+
+class CustomerOrders:
+    """Deterministic generator for the `customer_orders` test table.
+
+    Yields the seed orders followed by `scale_factor` million generated orders,
+    in record batches of at most `batch_size` rows so the table never has to
+    fit in memory. A fingerprint of every status is taken while the batches
+    are generated, so the verify tests know what to expect at any scale.
+    Amounts are generated in whole cents to keep the fingerprints exact."""
+
+    def __init__(
+        self,
+        scale_factor: float = 0,
+        seed: int = 0,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ):
+        self.rows = int(scale_factor * ROWS_PER_SCALE_FACTOR)
+        self.customers = max(1, int(scale_factor * CUSTOMERS_PER_SCALE_FACTOR))
+        self.seed = seed
+        self.batch_size = batch_size
+        # Fingerprints of the generated rows, by status
+        self._generated: Optional[Dict[str, Fingerprint]] = None
+
+    def batches(self) -> Iterator[pa.RecordBatch]:
+        yield pa.RecordBatch.from_pylist(
+            [
+                {
+                    "customer_id": customer_id,
+                    "order_id": order_id,
+                    "order_date": order_date,
+                    "total_amount": cents / 100,
+                    "status": status,
+                }
+                for customer_id, order_id, order_date, cents, status in SEED_ORDERS
+            ],
+            schema=CUSTOMER_ORDERS_SCHEMA,
+        )
+
+        fingerprints = {status: Fingerprint() for status in STATUSES}
+        for offset in range(0, self.rows, self.batch_size):
+            customer_ids, order_ids, order_dates, cents, statuses = self._columns(
+                offset, min(self.batch_size, self.rows - offset)
+            )
+            dates = yyyymmdd(order_dates)
+            for index, status in enumerate(STATUSES):
+                selected = statuses == index
+                fingerprints[status].add(
+                    order_ids[selected],
+                    customer_ids[selected],
+                    dates[selected],
+                    cents[selected],
+                )
+
+            yield pa.RecordBatch.from_arrays(
+                [
+                    pa.array(customer_ids),
+                    pa.array(order_ids),
+                    pa.array(order_dates, type=pa.date32()),
+                    pa.array(cents / 100),
+                    pa.array(STATUSES).take(pa.array(statuses)),
+                ],
+                schema=CUSTOMER_ORDERS_SCHEMA,
+            )
+        self._generated = fingerprints
+
+    def _columns(self, offset: int, size: int) -> Tuple[np.ndarray, ...]:
+        # Seeded by the batch's offset, so the same seed and batch size always
+        # generate the same data
+        rng = np.random.default_rng([self.seed, offset])
+
+        order_ids = np.arange(
+            FIRST_GENERATED_ORDER_ID + offset,
+            FIRST_GENERATED_ORDER_ID + offset + size,
+            dtype=np.int64,
+        )
+        customer_ids = rng.integers(
+            FIRST_GENERATED_CUSTOMER_ID,
+            FIRST_GENERATED_CUSTOMER_ID + self.customers,
+            size,
+            dtype=np.int64,
+        )
+        days = rng.integers(0, DAYS, size).astype("timedelta64[D]")
+        order_dates = START_DATE + days
+        cents = rng.integers(100, 100_000, size, dtype=np.int64)
+        statuses = rng.integers(0, len(STATUSES), size)
+        return customer_ids, order_ids, order_dates, cents, statuses
+
+    def fingerprints(
+        self, status_updates: Optional[Dict[int, str]] = None
+    ) -> Dict[str, Fingerprint]:
+        """Expected fingerprint of each status, after changing the status of the
+        seed orders in `status_updates` (order ID -> new status)."""
+        if self.rows and self._generated is None:
+            raise RuntimeError("Fingerprints are only known once all rows are written")
+
+        fingerprints = {
+            status: Fingerprint(f.count, f.cents, f.row_hash)
+            for status, f in (self._generated or {}).items()
+            if f.count
+        }
+        for order_id, customer_id, order_date, cents, status in self._seed_rows(
+            status_updates
+        ):
+            fingerprints.setdefault(status, Fingerprint()).add(
+                [order_id], [customer_id], [order_date], [cents]
+            )
+        return fingerprints
+
+    def expected_rows(
+        self, status: str, status_updates: Optional[Dict[int, str]] = None
+    ) -> Iterator[Row]:
+        """Stream the rows of one status ordered by order_id, regenerating the
+        data a batch at a time."""
+        for order_id, customer_id, order_date, cents, row_status in self._seed_rows(
+            status_updates
+        ):
+            if row_status == status:
+                yield order_id, customer_id, order_date, cents
+
+        if status not in STATUSES:
+            return
+        index = STATUSES.index(status)
+        for offset in range(0, self.rows, self.batch_size):
+            customer_ids, order_ids, order_dates, cents, statuses = self._columns(
+                offset, min(self.batch_size, self.rows - offset)
+            )
+            selected = statuses == index
+            yield from zip(
+                order_ids[selected].tolist(),
+                customer_ids[selected].tolist(),
+                yyyymmdd(order_dates[selected]).tolist(),
+                cents[selected].tolist(),
+            )
+
+    def _seed_rows(
+        self, status_updates: Optional[Dict[int, str]]
+    ) -> Iterator[Tuple[int, int, int, int, str]]:
+        for customer_id, order_id, order_date, cents, status in SEED_ORDERS:
+            day = order_date.year * 10000 + order_date.month * 100 + order_date.day
+            status = (status_updates or {}).get(order_id, status)
+            yield order_id, customer_id, day, cents, status
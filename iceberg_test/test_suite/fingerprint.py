@@ -0,0 +1,127 @@
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Tuple
+import numpy as np
+
+# Order-independent fingerprints of the customer_orders table, computed by the
+# query engine in SQL and by the generator on the data it writes. Only the
+# fingerprints cross the wire, so verifying a table takes the same memory
+# whatever its size.
+#
+# The row hash is integer arithmetic both sides evaluate identically: dates as
+# YYYYMMDD, amounts in whole cents, each row's hash below 2^31 so that summing
+# billions of them still fits a BIGINT.
+
+HASH_MODULUS = 2_147_483_647
+
+DATE_SQL = "(YEAR(order_date) * 10000 + MONTH(order_date) * 100 + DAY(order_date))"
+CENTS_SQL = "CAST(ROUND(total_amount * 100) AS BIGINT)"
+ROW_HASH_SQL = (
+    f"MOD(order_id * 1000003 + customer_id * 7919 + {DATE_SQL} * 101 + {CENTS_SQL}, "
+    f"{HASH_MODULUS})"
+)
+
+FINGERPRINT_SQL = f"""
+    SELECT status, COUNT(*), SUM({CENTS_SQL}), SUM({ROW_HASH_SQL})
+    FROM {{table}}
+    GROUP BY status
+"""
+
+# Fetched in pages keyed on order_id, so no page needs an OFFSET scan
+ROWS_SQL = f"""
+    SELECT order_id, customer_id, {DATE_SQL}, {CENTS_SQL}
+    FROM {{table}}
+    WHERE status = '{{status}}' AND order_id > {{after}}
+    ORDER BY order_id
+    LIMIT {{limit}}
+"""
+
+# order_id, customer_id, YYYYMMDD, cents
+Row = Tuple[int, int, int, int]
+
+
+@dataclass
+class Fingerprint:
+    """Row count, total amount in cents and sum of row hashes."""
+
+    count: int = 0
+    cents: int = 0
+    row_hash: int = 0
+
+    def add(self, order_ids, customer_ids, dates, cents) -> None:
+        """Add rows, given as equally long NumPy arrays. Dates are YYYYMMDD."""
+        self.count += len(order_ids)
+        self.cents += int(np.sum(cents, dtype=np.int64))
+        self.row_hash += int(
+            np.sum(row_hashes(order_ids, customer_ids, dates, cents), dtype=np.int64)
+        )
+
+
+def row_hashes(order_ids, customer_ids, dates, cents) -> np.ndarray:
+    """ROW_HASH_SQL, vectorized."""
+    return (
+        np.asarray(order_ids, dtype=np.int64) * 1000003
+        + np.asarray(customer_ids, dtype=np.int64) * 7919
+        + np.asarray(dates, dtype=np.int64) * 101
+        + np.asarray(cents, dtype=np.int64)
+    ) % HASH_MODULUS
+
+
+def yyyymmdd(dates: np.ndarray) -> np.ndarray:
+    """datetime64[D] dates as YYYYMMDD integers."""
+    months = dates.astype("datetime64[M]")
+    years = months.astype("datetime64[Y]").astype(np.int64) + 1970
+    month_numbers = months.astype(np.int64) % 12 + 1
+    days = (dates - months).astype(np.int64) + 1
+    return years * 10000 + month_numbers * 100 + days
+
+
+def table_fingerprints(
+    execute_query: Callable[[str], List[List]], table: str
+) -> Dict[str, Fingerprint]:
+    """Fingerprint of each status in `table`, computed by the engine."""
+    return {
+        status: Fingerprint(int(count), int(cents or 0), int(row_hash or 0))
+        for status, count, cents, row_hash in execute_query(
+            FINGERPRINT_SQL.format(table=table)
+        )
+    }
+
+
+def table_rows(
+    execute_query: Callable[[str], List[List]],
+    table: str,
+    status: str,
+    page_size: int = 10_000,
+) -> Iterator[Row]:
+    """Stream the rows of one status ordered by order_id, a page at a time."""
+    after = -1
+    while True:
+        page = execute_query(
+            ROWS_SQL.format(table=table, status=status, after=after, limit=page_size)
+        )
+        for row in page:
+            yield tuple(int(value) for value in row)
+        if len(page) < page_size:
+            return
+        after = int(page[-1][0])
+
+
+def diff_rows(
+    expected: Iterator[Row], actual: Iterator[Row], limit: int = 10
+) -> List[str]:
+    """Merge two streams of rows ordered by order_id and describe up to `limit`
+    differences between them."""
+    differences = []
+    expected_row, actual_row = next(expected, None), next(actual, None)
+    while (expected_row or actual_row) and len(differences) < limit:
+        if actual_row is None or (expected_row and expected_row[0] < actual_row[0]):
+            differences.append(f"missing {expected_row}")
+            expected_row = next(expected, None)
+        elif expected_row is None or actual_row[0] < expected_row[0]:
+            differences.append(f"unexpected {actual_row}")
+            actual_row = next(actual, None)
+        else:
+            if expected_row != actual_row:
+                differences.append(f"expected {expected_row}, got {actual_row}")
+            expected_row, actual_row = next(expected, None), next(actual, None)
+    return differences
@@ -0,0 +1,204 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+import queue
+import threading
+import time
+import pyarrow as pa
+
+from .suite import TestSuite
+from ..benchmark import LatencyBenchmark, summarize
+from ..base import Catalog, QueryEngine, Storage
+
+METADATA_SCHEMA = pa.schema([("id", pa.int64())])
+
+DEFAULT_NAMESPACES = 10
+DEFAULT_TABLES = 10
+DEFAULT_CONCURRENCY = "1,4,16"
+
+
+class CatalogMetadataSuite(TestSuite):
+    """Throughput and tail latency of catalog metadata operations at scale.
+
+    Creates N namespaces of M tables each through pyiceberg, then, at each
+    concurrency level, times listing namespaces, listing the tables of every
+    namespace and loading every table. Dropping is timed by dropping an equal
+    share of the tables at each level. Each concurrent operation uses a
+    pyiceberg client of its own, set up before timing starts. Operations per
+    second and latency percentiles are recorded as metrics.
+
+    Set with `--suite-option namespaces=10`, `--suite-option tables=10` (per
+    namespace) and `--suite-option concurrency=1,4,16`."""
+
+    name = "metadata"
+    description = "Catalog metadata throughput suite"
+
+    def __init__(
+        self,
+        storage: Storage,
+        catalog: Catalog,
+        query_engine: QueryEngine,
+        namespace: Optional[str] = None,
+        scale_factor: float = 0,
+        benchmark: Optional[LatencyBenchmark] = None,
+        options: Optional[Dict[str, str]] = None,
+    ):
+        super().__init__(
+            storage,
+            catalog,
+            query_engine,
+            namespace,
+            scale_factor,
+            benchmark,
+            options,
+        )
+
+        levels = self.options.get("concurrency", DEFAULT_CONCURRENCY)
+        self.levels = sorted({int(n) for n in levels.split(",")})
+        namespaces = int(self.options.get("namespaces", DEFAULT_NAMESPACES))
+        tables = int(self.options.get("tables", DEFAULT_TABLES))
+        self.tests = (
+            ["test_create_metadata"]
+            + [f"concurrency_{n}" for n in self.levels]
+            + ["test_drop_namespaces"]
+        )
+
+        self.namespaces = [
+            self.table_name(f"metadata_{index}") for index in range(namespaces)
+        ]
+        self.identifiers = [
+            f"{namespace}.table_{index}"
+            for namespace in self.namespaces
+            for index in range(tables)
+        ]
+        # Tables not dropped yet, each level drops its share
+        self.remaining = list(self.identifiers)
+
+    def run_test(self, test: str) -> None:
+        if test.startswith("concurrency_"):
+            self.run_level(int(test.removeprefix("concurrency_")))
+        else:
+            super().run_test(test)
+
+    def test_create_metadata(self):
+        clients = self.clients(max(self.levels))
+        self.record_metrics(
+            **self.timed(
+                "create_namespace",
+                [
+                    lambda client, namespace=namespace: client.create_namespace(
+                        namespace
+                    )
+                    for namespace in self.namespaces
+                ],
+                clients,
+            ),
+            **self.timed(
+                "create_table",
+                [
+                    lambda client, identifier=identifier: self.create_table(
+                        client, identifier
+                    )
+                    for identifier in self.identifiers
+                ],
+                clients,
+            ),
+        )
+
+    def create_table(self, client, identifier: str):
+        namespace, name = identifier.split(".")
+        client.create_table(
+            identifier,
+            schema=METADATA_SCHEMA,
+            location=f"{self.storage.bucket_url}/{self.catalog.catalog_name}/{namespace}/{name}",
+        )
+
+    def run_level(self, concurrency: int):
+        # Drop an equal share of the tables at each level, the rest at the last
+        existing = self.remaining
+        levels_left = len(self.levels) - self.levels.index(concurrency)
+        dropped = existing[: len(existing) // levels_left]
+        self.remaining = existing[len(dropped) :]
+
+        clients = self.clients(concurrency)
+        self.record_metrics(
+            concurrency=concurrency,
+            **self.timed(
+                "list_namespaces",
+                [lambda client: client.list_namespaces()] * len(self.namespaces),
+                clients,
+            ),
+            **self.timed(
+                "list_tables",
+                [
+                    lambda client, namespace=namespace: client.list_tables(namespace)
+                    for namespace in self.namespaces
+                ],
+                clients,
+            ),
+            **self.timed(
+                "load_table",
+                [
+                    lambda client, identifier=identifier: client.load_table(identifier)
+                    for identifier in existing
+                ],
+                clients,
+            ),
+            **self.timed(
+                "drop_table",
+                [
+                    lambda client, identifier=identifier: client.drop_table(identifier)
+                    for identifier in dropped
+                ],
+                clients,
+            ),
+        )
+
+    def clients(self, concurrency: int) -> List:
+        """One pyiceberg client per concurrent operation."""
+        return [self.iceberg_catalog() for _ in range(concurrency)]
+
+    def timed(
+        self, operation: str, calls: List[Callable[[Any], Any]], clients: List
+    ) -> Dict[str, float]:
+        """Run `calls` concurrently, each passed a client no other running call
+        is using. Returns the operations per second and latency percentiles,
+        keyed by operation."""
+        if not calls:
+            return {}
+
+        idle = queue.SimpleQueue()
+        for client in clients:
+            idle.put(client)
+
+        def run(call: Callable[[Any], Any]) -> float:
+            client = idle.get()
+            try:
+                start = time.perf_counter()
+                call(client)
+                return time.perf_counter() - start
+            finally:
+                idle.put(client)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(
+            max_workers=len(clients),
+            thread_name_prefix=threading.current_thread().name,
+        ) as executor:
+            latencies = list(executor.map(run, calls))
+        elapsed = time.perf_counter() - start
+
+        return {
+            f"{operation}_per_second": round(len(calls) / elapsed, 2),
+            **{
+                f"{operation}_{name}": value
+                for name, value in summarize(latencies).items()
+                if name in ("p50", "p99")
+            },
+        }
+
+    def test_drop_namespaces(self):
+        catalog = self.iceberg_catalog()
+        for identifier in self.remaining:
+            catalog.drop_table(identifier)
+        for namespace in self.namespaces:
+            catalog.drop_namespace(namespace)
@@ -0,0 +1,192 @@
+from typing import Dict, List, Optional, Tuple
+import pyarrow as pa
+from pyiceberg.transforms import (
+    BucketTransform,
+    DayTransform,
+    IdentityTransform,
+    MonthTransform,
+    Transform,
+)
+
+from .data import CUSTOMER_ORDERS_SCHEMA, CustomerOrders
+from .suite import PerformanceFailure, TestSuite
+from ..benchmark import LatencyBenchmark
+from ..base import Catalog, Partition, QueryEngine, QueryStats, Storage
+
+# Partition spec of each variant, and a predicate on the partition column that
+# selects a small part of the data
+VARIANTS: Dict[str, Tuple[List[Partition], str]] = {
+    "identity": ([Partition("status")], "status = 'PENDING'"),
+    "day": ([Partition("order_date", "day")], "order_date = DATE '2022-06-15'"),
+    "month": (
+        [Partition("order_date", "month")],
+        "order_date >= DATE '2022-06-01' AND order_date < DATE '2022-07-01'",
+    ),
+    "bucket": ([Partition("customer_id", "bucket", 16)], "customer_id = 1"),
+}
+
+# The tests of each variant and the ones they depend on. The variant's table
+# is created and written through pyiceberg, then again by the query engine's
+# DDL and an INSERT ... SELECT from the pyiceberg table
+TEST_DEPENDENCIES = {
+    "create_{}_pyiceberg": [],
+    "create_{}_engine": ["create_{}_pyiceberg"],
+    "prune_{}_pyiceberg": ["create_{}_pyiceberg"],
+    "prune_{}_engine": ["create_{}_engine"],
+    "drop_{}_engine": ["prune_{}_engine"],
+    "drop_{}_pyiceberg": ["prune_{}_pyiceberg", "create_{}_engine"],
+}
+
+SCAN_SQL = "SELECT COUNT(*), SUM(total_amount) FROM {table}"
+
+
+def iceberg_transform(partition: Partition) -> Transform:
+    if partition.transform == "bucket":
+        return BucketTransform(partition.parameter)
+    return {
+        "identity": IdentityTransform(),
+        "day": DayTransform(),
+        "month": MonthTransform(),
+    }[partition.transform]
+
+
+class PartitioningSuite(TestSuite):
+    """Partitioned tables, and whether the engine prunes them.
+
+    Creates the `customer_orders` table with each partition spec in VARIANTS,
+    once through pyiceberg and once through the engine's DDL. A selective
+    query on the partition column must scan fewer rows than a full scan, per
+    the statistics the engine reports, or the test is a performance failure.
+    Each variant runs on its own tables, concurrently with the others."""
+
+    name = "partitioning"
+    description = "Partitioned table suite"
+
+    def __init__(
+        self,
+        storage: Storage,
+        catalog: Catalog,
+        query_engine: QueryEngine,
+        namespace: Optional[str] = None,
+        scale_factor: float = 0,
+        benchmark: Optional[LatencyBenchmark] = None,
+        options: Optional[Dict[str, str]] = None,
+    ):
+        super().__init__(
+            storage,
+            catalog,
+            query_engine,
+            namespace,
+            scale_factor or 0.01,
+            benchmark,
+            options,
+        )
+        self.orders = CustomerOrders(self.scale_factor)
+
+        self.tests = []
+        self.dependencies = {}
+        for variant in VARIANTS:
+            for test, dependencies in TEST_DEPENDENCIES.items():
+                self.tests.append(test.format(variant))
+                self.dependencies[test.format(variant)] = [
+                    dependency.format(variant) for dependency in dependencies
+                ]
+
+    def variant_table(self, variant: str, source: str) -> str:
+        return self.table_name(f"customer_orders_{variant}_{source}")
+
+    def engine_table(self, variant: str, source: str) -> str:
+        return f"{self.test_schema}.{self.variant_table(variant, source)}"
+
+    def run_test(self, test: str) -> None:
+        action, variant, source = test.split("_")
+        getattr(self, f"{action}_{source}")(variant)
+
+    def create_pyiceberg(self, variant: str):
+        name = self.variant_table(variant, "pyiceberg")
+        partitioning, _ = VARIANTS[variant]
+
+        catalog = self.iceberg_catalog()
+        table = catalog.create_table(
+            f"{self.catalog.catalog_name}.{name}",
+            schema=CUSTOMER_ORDERS_SCHEMA,
+            location=f"{self.storage.bucket_url}/{self.catalog.catalog_name}/{name}",
+        )
+        with table.update_spec() as update:
+            for partition in partitioning:
+                update.add_field(
+                    partition.column, iceberg_transform(partition), partition.name
+                )
+        with table.transaction() as transaction:
+            for batch in self.orders.batches():
+                transaction.append(pa.Table.from_batches([batch]))
+
+        self.query_engine.link_table(self.engine_table(variant, "pyiceberg"))
+
+    def create_engine(self, variant: str):
+        test_table = self.engine_table(variant, "engine")
+        partitioning, _ = VARIANTS[variant]
+
+        self.query_engine.create_table(test_table, partitioning)
+        self.query_engine.execute_query(
+            f"""
+            INSERT INTO {test_table}
+            SELECT customer_id, order_id, order_date,
+                CAST(total_amount AS DECIMAL(10,2)), status
+            FROM {self.engine_table(variant, "pyiceberg")}
+            """
+        )
+
+    def prune_pyiceberg(self, variant: str):
+        self.check_pruning(variant, "pyiceberg")
+
+    def prune_engine(self, variant: str):
+        self.check_pruning(variant, "engine")
+
+    def check_pruning(self, variant: str, source: str):
+        """Compare the work a selective query does with a full scan's."""
+        test_table = self.engine_table(variant, source)
+        _, predicate = VARIANTS[variant]
+
+        full_scan, full_latency = self.scan(SCAN_SQL.format(table=test_table))
+        selective, selective_latency = self.scan(
+            f"{SCAN_SQL.format(table=test_table)} WHERE {predicate}"
+        )
+        metrics = {
+            "full_scan": round(full_latency, 4),
+            "full_scan_rows": full_scan.rows_scanned,
+            "full_scan_splits": full_scan.splits,
+            "selective": round(selective_latency, 4),
+            "selective_rows": selective.rows_scanned,
+            "selective_splits": selective.splits,
+        }
+        # Leave out the statistics the engine doesn't report
+        self.record_metrics(
+            **{name: value for name, value in metrics.items() if value is not None}
+        )
+
+        if full_scan.rows_scanned is None or selective.rows_scanned is None:
+            raise RuntimeError(f"{self.query_engine.name} didn't report rows scanned")
+        if selective.rows_scanned >= full_scan.rows_scanned:
+            raise PerformanceFailure(
+                f"{test_table} wasn't pruned: WHERE {predicate} scanned "
+                f"{selective.rows_scanned} rows, as many as a full scan"
+            )
+
+    def scan(self, query: str) -> Tuple[QueryStats, float]:
+        (_, stats), latency = self.sample(
+            lambda: self.query_engine.execute_query_with_stats(query)
+        )
+        return stats, latency
+
+    def drop_pyiceberg(self, variant: str):
+        self.query_engine.unlink_table(self.engine_table(variant, "pyiceberg"))
+
+        catalog = self.iceberg_catalog()
+        catalog.drop_table(
+            f"{self.catalog.catalog_name}.{self.variant_table(variant, 'pyiceberg')}"
+        )
+
+    def drop_engine(self, variant: str):
+        test_table = self.engine_table(variant, "engine")
+        self.query_engine.execute_query(f"DROP TABLE {test_table}")
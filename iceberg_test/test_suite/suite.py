@@ -0,0 +1,203 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+import threading
+import time
+
+from pyiceberg.catalog import load_catalog
+
+from ..base import Catalog, QueryEngine, QueryStats, Storage, logger
+from ..benchmark import LatencyBenchmark, percentile, summarize
+
+T = TypeVar("T")
+
+
+class PerformanceFailure(AssertionError):
+    """Raised by a test whose results are right, but which made the engine do
+    far more work than it should have, e.g. a full scan for a selective
+    query."""
+
+
+class TestSuite:
+    """Base class for the suites that run against a stack.
+
+    A suite lists its test methods in `tests`, each one passes unless it
+    raises, and raising PerformanceFailure marks it as too slow rather than
+    broken. By default the tests run one after the other, in order. Suites
+    whose tests form independent chains declare `dependencies` instead (test ->
+    tests that must finish before it starts), and tests run concurrently as
+    soon as their dependencies are done, whether those passed or not."""
+
+    name: str
+    description: str
+    tests: List[str] = []
+    dependencies: Optional[Dict[str, List[str]]] = None
+
+    def __init__(
+        self,
+        storage: Storage,
+        catalog: Catalog,
+        query_engine: QueryEngine,
+        namespace: Optional[str] = None,
+        scale_factor: float = 0,
+        benchmark: Optional[LatencyBenchmark] = None,
+        options: Optional[Dict[str, str]] = None,
+    ):
+        """`namespace` prefixes every table the suite creates, so that several
+        suites can share one storage + catalog without seeing each other's data.
+        `scale_factor` sets how much data suites that generate data load. With
+        a `benchmark`, read-only queries run repeatedly to sample latencies.
+        `options` are suite specific settings passed on the command line."""
+        self.storage = storage
+        self.catalog = catalog
+        self.query_engine = query_engine
+        self.namespace = namespace
+        self.scale_factor = scale_factor
+        self.benchmark = benchmark
+        self.options = options or {}
+        # Latencies and metrics measured by the test running on the current thread
+        self._latencies = threading.local()
+
+        self.test_catalog = "iceberg_test"
+        self.test_schema = f"{self.test_catalog}.regression"
+
+    def table_name(self, name: str) -> str:
+        """Name of one of the suite's tables, unique to its namespace."""
+        return name if self.namespace is None else f"{self.namespace}_{name}"
+
+    def iceberg_catalog(self):
+        """pyiceberg client for the stack's catalog."""
+        return load_catalog(
+            **self.storage.catalog_properties, **self.catalog.catalog_properties
+        )
+
+    def run_test(self, test: str) -> None:
+        getattr(self, test)()
+
+    def sample(self, run: Callable[[], T]) -> Tuple[T, float]:
+        """Time `run`. In benchmark mode, it is repeated and the median latency
+        returned. Returns the result of the last run and its latency."""
+        if self.benchmark is None:
+            start = time.perf_counter()
+            result = run()
+            return result, time.perf_counter() - start
+
+        result, samples = self.benchmark.measure(run)
+        return result, percentile(samples, 50)
+
+    def record_metrics(self, **metrics: Any) -> None:
+        """Attach measurements to the result of the running test, for suites
+        whose output is a curve rather than pass / fail."""
+        self._latencies.metrics.update(metrics)
+
+    def measure_query(self, query: str, name: Optional[str] = None) -> List[List]:
+        """Execute a read-only query. In benchmark mode it is repeated and its
+        latencies recorded with the result of the running test, under `name`
+        (the test's name by default)."""
+        if self.benchmark is None:
+            return self.query_engine.execute_query(query)
+
+        result, samples = self.benchmark.measure(
+            lambda: self.query_engine.execute_query(query)
+        )
+        self._latencies.queries.append(
+            {
+                "query": name or self._latencies.test,
+                **summarize(samples),
+                "samples": [round(sample, 4) for sample in samples],
+            }
+        )
+        return result
+
+    def test_dependencies(self) -> Dict[str, List[str]]:
+        if self.dependencies is not None:
+            return self.dependencies
+        # One chain, in the order the tests are listed
+        return {
+            test: self.tests[index - 1 : index] if index else []
+            for index, test in enumerate(self.tests)
+        }
+
+    def run(
+        self, on_result: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Tuple[bool, List[Dict[str, Any]]]:
+        """Run all tests in the suite. `on_result` is called with the result of
+        each test as soon as it finishes. Results are returned in the order the
+        tests are listed."""
+        logger.info(f"Running {self.description}...")
+
+        dependencies = self.test_dependencies()
+        pending = list(self.tests)
+        running = {}
+        results = {}
+
+        with ThreadPoolExecutor(
+            max_workers=len(self.tests),
+            thread_name_prefix=threading.current_thread().name,
+        ) as executor:
+            while pending or running:
+                for test in list(pending):
+                    if all(d in results for d in dependencies.get(test, [])):
+                        running[executor.submit(self._run_one, test)] = test
+                        pending.remove(test)
+
+                if not running:
+                    raise RuntimeError(f"Unsatisfiable dependencies: {pending}")
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    result = future.result()
+                    results[running.pop(future)] = result
+                    if on_result is not None:
+                        on_result(result)
+
+        results = [results[test] for test in self.tests]
+        success = all(result["status"] == "success" for result in results)
+        if success:
+            logger.info("All tests passed successfully!")
+        return success, results
+
+    def _run_one(self, test: str) -> Dict[str, Any]:
+        start = time.monotonic()
+        self._latencies.test = test
+        self._latencies.queries = []
+        self._latencies.metrics = {}
+        # Captures are per thread, so concurrent tests only see their own queries
+        with self.query_engine.capture_queries() as queries:
+            try:
+                self.run_test(test)
+                logger.info(f"✅ {test}")
+                status = "success"
+            except PerformanceFailure as e:
+                logger.warning(f"🐢 {test}: {str(e)}")
+                status = "performance_failure"
+            except Exception as e:
+                logger.error(f"❌ {test}: {str(e)}", exc_info=True)
+                status = "failed"
+
+        duration = time.monotonic() - start
+        # Outside the capture, so looking up stats isn't counted as a query
+        stats = [q["stats"] for q in queries if "stats" in q]
+        try:
+            self.query_engine.complete_stats(stats)
+        except Exception as e:
+            logger.warning(f"Couldn't complete query stats of {test}: {str(e)}")
+
+        result = {
+            "test": test,
+            "status": status,
+            "duration": round(duration, 3),
+            "query_count": len(queries),
+            "query_duration": round(sum(q["duration"] for q in queries), 3),
+        }
+        if any(s.to_dict() for s in stats):
+            result["query_stats"] = QueryStats.total(stats).to_dict()
+            result["queries"] = [
+                {"duration": round(q["duration"], 3), **q["stats"].to_dict()}
+                for q in queries
+                if "stats" in q
+            ]
+        if self._latencies.queries:
+            result["latency"] = self._latencies.queries
+        if self._latencies.metrics:
+            result["metrics"] = self._latencies.metrics
+        return result
@@ -0,0 +1,129 @@
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+import pyarrow as pa
+
+from .suite import TestSuite
+from ..benchmark import LatencyBenchmark
+from ..base import Catalog, QueryEngine, Storage
+
+SNAPSHOTS_SCHEMA = pa.schema([("id", pa.int64())])
+
+# Snapshot counts at which latencies are measured
+DEFAULT_CHECKPOINTS = "10,100,1000,10000"
+
+
+class TimeTravelSuite(TestSuite):
+    """How time travel degrades as a table's history grows.
+
+    Commits one-row appends through pyiceberg until the table has as many
+    snapshots as the next checkpoint, then times loading the table from the
+    catalog and querying it as of its oldest snapshot, as of the time of its
+    middle one and as it is now. Each checkpoint is one test, whose metrics
+    give a latency vs snapshot count curve for the stack.
+
+    Checkpoints are set with `--suite-option snapshots=10,100,1000`."""
+
+    name = "timetravel"
+    description = "Time travel scaling suite"
+
+    def __init__(
+        self,
+        storage: Storage,
+        catalog: Catalog,
+        query_engine: QueryEngine,
+        namespace: Optional[str] = None,
+        scale_factor: float = 0,
+        benchmark: Optional[LatencyBenchmark] = None,
+        options: Optional[Dict[str, str]] = None,
+    ):
+        super().__init__(
+            storage,
+            catalog,
+            query_engine,
+            namespace,
+            scale_factor,
+            benchmark,
+            options,
+        )
+
+        checkpoints = self.options.get("snapshots", DEFAULT_CHECKPOINTS)
+        self.checkpoints = sorted({int(n) for n in checkpoints.split(",")})
+        self.tests = (
+            ["test_create_table"]
+            + [f"snapshots_{n}" for n in self.checkpoints]
+            + ["test_drop_table"]
+        )
+
+        self.test_name = self.table_name("snapshots")
+        self.test_table = f"{self.test_schema}.{self.test_name}"
+        self.identifier = f"{self.catalog.catalog_name}.{self.test_name}"
+        # ID and commit time of every snapshot, oldest first
+        self.snapshots: List[Tuple[int, datetime]] = []
+
+    def run_test(self, test: str) -> None:
+        if test.startswith("snapshots_"):
+            self.run_checkpoint(int(test.removeprefix("snapshots_")))
+        else:
+            super().run_test(test)
+
+    def test_create_table(self):
+        catalog = self.iceberg_catalog()
+        catalog.create_table(
+            self.identifier,
+            schema=SNAPSHOTS_SCHEMA,
+            location=f"{self.storage.bucket_url}/{self.catalog.catalog_name}/{self.test_name}",
+        )
+        # Registering the table needs a metadata file with a snapshot
+        self.commit_snapshots(1)
+        self.query_engine.link_table(self.test_table)
+
+    def run_checkpoint(self, snapshots: int):
+        self.commit_snapshots(snapshots)
+
+        catalog = self.iceberg_catalog()
+        _, load_table = self.sample(lambda: catalog.load_table(self.identifier))
+        self.record_metrics(
+            snapshots=len(self.snapshots), load_table=round(load_table, 4)
+        )
+
+        oldest_id, _ = self.snapshots[0]
+        middle = len(self.snapshots) // 2
+        _, middle_timestamp = self.snapshots[middle]
+        queries = {
+            # Row k is added by snapshot k, so each snapshot's count is its position
+            "version_as_of": (
+                self.query_engine.version_as_of(self.test_table, oldest_id),
+                1,
+            ),
+            "timestamp_as_of": (
+                self.query_engine.timestamp_as_of(self.test_table, middle_timestamp),
+                middle + 1,
+            ),
+            "current": (self.test_table, len(self.snapshots)),
+        }
+        for name, (table, expected) in queries.items():
+            result, latency = self.sample(
+                lambda: self.query_engine.execute_query(f"SELECT COUNT(*) FROM {table}")
+            )
+            self.record_metrics(**{name: round(latency, 4)})
+            count = result[0][0]
+            assert count == expected, f"{name}: expected {expected} rows, got {count}"
+
+    def commit_snapshots(self, snapshots: int):
+        """Append one row per commit until the table has `snapshots` snapshots."""
+        table = self.iceberg_catalog().load_table(self.identifier)
+        for row_id in range(len(self.snapshots) + 1, snapshots + 1):
+            table.append(pa.table({"id": [row_id]}, schema=SNAPSHOTS_SCHEMA))
+            snapshot = table.current_snapshot()
+            self.snapshots.append(
+                (
+                    snapshot.snapshot_id,
+                    datetime.fromtimestamp(snapshot.timestamp_ms / 1000, timezone.utc),
+                )
+            )
+
+    def test_drop_table(self):
+        self.query_engine.unlink_table(self.test_table)
+
+        catalog = self.iceberg_catalog()
+        catalog.drop_table(self.identifier)
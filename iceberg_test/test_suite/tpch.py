@@ -0,0 +1,935 @@
+from typing import Dict, Iterator, List, Optional, Tuple
+import numpy as np
+import pyarrow as pa
+
+from .data import DEFAULT_BATCH_SIZE
+from .suite import TestSuite
+from ..benchmark import LatencyBenchmark
+from ..base import Catalog, QueryEngine, Storage
+
+# TPC-H data generated locally, following the shape of dbgen: the schema,
+# cardinalities, value domains and key relationships of the specification, so
+# every query has data to select. Values are drawn with NumPy rather than with
+# dbgen's own generator, so results don't match the reference answer set.
+
+REGIONS = ["AFRICA", "AMERICA", "ASIA", "EUROPE", "MIDDLE EAST"]
+# Name -> region key
+NATIONS = [
+    ("ALGERIA", 0),
+    ("ARGENTINA", 1),
+    ("BRAZIL", 1),
+    ("CANADA", 1),
+    ("EGYPT", 4),
+    ("ETHIOPIA", 0),
+    ("FRANCE", 3),
+    ("GERMANY", 3),
+    ("INDIA", 2),
+    ("INDONESIA", 2),
+    ("IRAN", 4),
+    ("IRAQ", 4),
+    ("JAPAN", 2),
+    ("JORDAN", 4),
+    ("KENYA", 0),
+    ("MOROCCO", 0),
+    ("MOZAMBIQUE", 0),
+    ("PERU", 1),
+    ("CHINA", 2),
+    ("ROMANIA", 3),
+    ("SAUDI ARABIA", 4),
+    ("VIETNAM", 2),
+    ("RUSSIA", 3),
+    ("UNITED KINGDOM", 3),
+    ("UNITED STATES", 1),
+]
+
+COLORS = (
+    "almond antique aquamarine azure beige bisque black blanched blue blush "
+    "brown burlywood burnished chartreuse chiffon chocolate coral cornflower "
+    "cornsilk cream cyan dark deep dim dodger drab firebrick floral forest "
+    "frosted gainsboro ghost goldenrod green grey honeydew hot indian ivory "
+    "khaki lace lavender lawn lemon light lime linen magenta maroon medium "
+    "metallic midnight mint misty moccasin navajo navy olive orange orchid pale "
+    "papaya peach peru pink plum powder puff purple red rose rosy royal saddle "
+    "salmon sandy seashell sienna sky slate smoke snow spring steel tan thistle "
+    "tomato turquoise violet wheat white yellow"
+).split()
+TYPE_SYLLABLES = [
+    ["STANDARD", "SMALL", "MEDIUM", "LARGE", "ECONOMY", "PROMO"],
+    ["ANODIZED", "BURNISHED", "PLATED", "POLISHED", "BRUSHED"],
+    ["TIN", "NICKEL", "BRASS", "STEEL", "COPPER"],
+]
+CONTAINER_SYLLABLES = [
+    ["SM", "LG", "MED", "JUMBO", "WRAP"],
+    ["CASE", "BOX", "BAG", "JAR", "PKG", "PACK", "CAN", "DRUM"],
+]
+SEGMENTS = ["AUTOMOBILE", "BUILDING", "FURNITURE", "MACHINERY", "HOUSEHOLD"]
+PRIORITIES = ["1-URGENT", "2-HIGH", "3-MEDIUM", "4-NOT SPECIFIED", "5-LOW"]
+INSTRUCTIONS = ["DELIVER IN PERSON", "COLLECT COD", "NONE", "TAKE BACK RETURN"]
+MODES = ["REG AIR", "AIR", "RAIL", "SHIP", "TRUCK", "MAIL", "FOB"]
+COMMENT_WORDS = (
+    "furiously carefully quickly slyly blithely fluffily regular final special "
+    "pending express ironic bold even unusual silent requests deposits "
+    "packages accounts instructions theodolites foxes pinto beans ideas "
+    "dependencies platelets asymptotes courts dolphins Customer Complaints"
+).split()
+
+START_DATE = np.datetime64("1992-01-01", "D")
+# Orders are placed up to 151 days before the end date, so they can all ship
+ORDER_DAYS = (np.datetime64("1998-08-02", "D") - START_DATE).astype(int) + 1
+CURRENT_DATE = np.datetime64("1995-06-17", "D")
+
+# Tables generated on their own, orders and lineitem are generated together
+TABLES = ["region", "nation", "supplier", "part", "partsupp", "customer"]
+
+
+def _schema(*columns: Tuple[str, pa.DataType]) -> pa.Schema:
+    return pa.schema(list(columns))
+
+
+SCHEMAS = {
+    "region": _schema(
+        ("r_regionkey", pa.int64()),
+        ("r_name", pa.string()),
+        ("r_comment", pa.string()),
+    ),
+    "nation": _schema(
+        ("n_nationkey", pa.int64()),
+        ("n_name", pa.string()),
+        ("n_regionkey", pa.int64()),
+        ("n_comment", pa.string()),
+    ),
+    "supplier": _schema(
+        ("s_suppkey", pa.int64()),
+        ("s_name", pa.string()),
+        ("s_address", pa.string()),
+        ("s_nationkey", pa.int64()),
+        ("s_phone", pa.string()),
+        ("s_acctbal", pa.float64()),
+        ("s_comment", pa.string()),
+    ),
+    "part": _schema(
+        ("p_partkey", pa.int64()),
+        ("p_name", pa.string()),
+        ("p_mfgr", pa.string()),
+        ("p_brand", pa.string()),
+        ("p_type", pa.string()),
+        ("p_size", pa.int64()),
+        ("p_container", pa.string()),
+        ("p_retailprice", pa.float64()),
+        ("p_comment", pa.string()),
+    ),
+    "partsupp": _schema(
+        ("ps_partkey", pa.int64()),
+        ("ps_suppkey", pa.int64()),
+        ("ps_availqty", pa.int64()),
+        ("ps_supplycost", pa.float64()),
+        ("ps_comment", pa.string()),
+    ),
+    "customer": _schema(
+        ("c_custkey", pa.int64()),
+        ("c_name", pa.string()),
+        ("c_address", pa.string()),
+        ("c_nationkey", pa.int64()),
+        ("c_phone", pa.string()),
+        ("c_acctbal", pa.float64()),
+        ("c_mktsegment", pa.string()),
+        ("c_comment", pa.string()),
+    ),
+    "orders": _schema(
+        ("o_orderkey", pa.int64()),
+        ("o_custkey", pa.int64()),
+        ("o_orderstatus", pa.string()),
+        ("o_totalprice", pa.float64()),
+        ("o_orderdate", pa.date32()),
+        ("o_orderpriority", pa.string()),
+        ("o_clerk", pa.string()),
+        ("o_shippriority", pa.int64()),
+        ("o_comment", pa.string()),
+    ),
+    "lineitem": _schema(
+        ("l_orderkey", pa.int64()),
+        ("l_partkey", pa.int64()),
+        ("l_suppkey", pa.int64()),
+        ("l_linenumber", pa.int64()),
+        ("l_quantity", pa.float64()),
+        ("l_extendedprice", pa.float64()),
+        ("l_discount", pa.float64()),
+        ("l_tax", pa.float64()),
+        ("l_returnflag", pa.string()),
+        ("l_linestatus", pa.string()),
+        ("l_shipdate", pa.date32()),
+        ("l_commitdate", pa.date32()),
+        ("l_receiptdate", pa.date32()),
+        ("l_shipinstruct", pa.string()),
+        ("l_shipmode", pa.string()),
+        ("l_comment", pa.string()),
+    ),
+}
+
+
+class TPCHGenerator:
+    """Deterministic, vectorized generator for the eight TPC-H tables.
+
+    Every table is yielded in record batches of at most `batch_size` rows, each
+    seeded by its table and offset, so the same seed and batch size always
+    generate the same data. Orders and their line items are generated
+    together, since the order status and total price are derived from the
+    line items."""
+
+    def __init__(
+        self, scale_factor: float, seed: int = 0, batch_size: int = DEFAULT_BATCH_SIZE
+    ):
+        self.scale_factor = scale_factor
+        self.seed = seed
+        self.batch_size = batch_size
+
+        self.suppliers = max(1, int(10_000 * scale_factor))
+        self.parts = max(1, int(200_000 * scale_factor))
+        self.customers = max(1, int(150_000 * scale_factor))
+        self.orders = max(1, int(1_500_000 * scale_factor))
+
+    def batches(self, table: str) -> Iterator[pa.RecordBatch]:
+        """Record batches of one of the tables in TABLES."""
+        rows = {
+            "region": len(REGIONS),
+            "nation": len(NATIONS),
+            "supplier": self.suppliers,
+            "part": self.parts,
+            "partsupp": self.parts,
+            "customer": self.customers,
+        }[table]
+        generate = getattr(self, f"_{table}")
+        for offset in range(0, rows, self.batch_size):
+            size = min(self.batch_size, rows - offset)
+            columns = generate(self._rng(table, offset), offset, size)
+            yield pa.RecordBatch.from_arrays(columns, schema=SCHEMAS[table])
+
+    def order_batches(self) -> Iterator[Tuple[pa.RecordBatch, pa.RecordBatch]]:
+        """Pairs of orders and line items record batches."""
+        for offset in range(0, self.orders, self.batch_size):
+            size = min(self.batch_size, self.orders - offset)
+            orders, lineitems = self._orders(self._rng("orders", offset), offset, size)
+            yield (
+                pa.RecordBatch.from_arrays(orders, schema=SCHEMAS["orders"]),
+                pa.RecordBatch.from_arrays(lineitems, schema=SCHEMAS["lineitem"]),
+            )
+
+    def _rng(self, table: str, offset: int) -> np.random.Generator:
+        return np.random.default_rng([self.seed, list(SCHEMAS).index(table), offset])
+
+    def _region(self, rng, offset, size):
+        keys = np.arange(offset, offset + size)
+        return [
+            pa.array(keys),
+            pa.array(REGIONS[offset : offset + size]),
+            _comments(rng, size),
+        ]
+
+    def _nation(self, rng, offset, size):
+        nations = NATIONS[offset : offset + size]
+        return [
+            pa.array(np.arange(offset, offset + size)),
+            pa.array([name for name, _ in nations]),
+            pa.array([region for _, region in nations], type=pa.int64()),
+            _comments(rng, size),
+        ]
+
+    def _supplier(self, rng, offset, size):
+        keys = np.arange(offset + 1, offset + size + 1)
+        nations = rng.integers(0, len(NATIONS), size)
+        comments = _join(rng, COMMENT_WORDS, 6, size)
+        # Some suppliers have complaints on file, as Q16 expects
+        complaints = rng.random(size) < 0.0005
+        comments[complaints] = "Customer " + comments[complaints] + " Complaints"
+        return [
+            pa.array(keys),
+            _keyed("Supplier#", keys),
+            _addresses(rng, size),
+            pa.array(nations),
+            _phones(rng, nations),
+            pa.array(_money(rng, -99_999, 999_999, size)),
+            pa.array(comments, type=pa.string()),
+        ]
+
+    def _part(self, rng, offset, size):
+        keys = np.arange(offset + 1, offset + size + 1)
+        manufacturers = rng.integers(1, 6, size)
+        brands = manufacturers * 10 + rng.integers(1, 6, size)
+        return [
+            pa.array(keys),
+            pa.array(_join(rng, COLORS, 5, size), type=pa.string()),
+            pa.array(np.char.add("Manufacturer#", manufacturers.astype(str))),
+            pa.array(np.char.add("Brand#", brands.astype(str))),
+            _syllables(rng, TYPE_SYLLABLES, size),
+            pa.array(rng.integers(1, 51, size)),
+            _syllables(rng, CONTAINER_SYLLABLES, size),
+            pa.array(_retail_price(keys)),
+            _comments(rng, size),
+        ]
+
+    def _partsupp(self, rng, offset, size):
+        # Four suppliers per part
+        parts = np.repeat(np.arange(offset + 1, offset + size + 1), 4)
+        rows = len(parts)
+        return [
+            pa.array(parts),
+            pa.array(self._supplier_of(parts, np.tile(np.arange(4), size))),
+            pa.array(rng.integers(1, 10_000, rows)),
+            pa.array(_money(rng, 100, 100_000, rows)),
+            _comments(rng, rows),
+        ]
+
+    def _customer(self, rng, offset, size):
+        keys = np.arange(offset + 1, offset + size + 1)
+        nations = rng.integers(0, len(NATIONS), size)
+        return [
+            pa.array(keys),
+            _keyed("Customer#", keys),
+            _addresses(rng, size),
+            pa.array(nations),
+            _phones(rng, nations),
+            pa.array(_money(rng, -99_999, 999_999, size)),
+            _choice(rng, SEGMENTS, size),
+            _comments(rng, size),
+        ]
+
+    def _orders(self, rng, offset, size):
+        keys = np.arange(offset + 1, offset + size + 1)
+        # A third of the customers never place an order, as Q13 and Q22 expect
+        customers = rng.integers(1, self.customers + 1, size)
+        customers = np.where(
+            (customers % 3 == 0) & (self.customers > 2), customers - 1, customers
+        )
+        order_dates = START_DATE + _days(rng, 0, ORDER_DAYS, size)
+
+        # Line items, 1 to 7 per order
+        counts = rng.integers(1, 8, size)
+        rows = int(counts.sum())
+        order_index = np.repeat(np.arange(size), counts)
+        first_rows = np.repeat(np.cumsum(counts) - counts, counts)
+        line_numbers = np.arange(rows) - first_rows + 1
+
+        parts = rng.integers(1, self.parts + 1, rows)
+        suppliers = self._supplier_of(parts, rng.integers(0, 4, rows))
+        quantities = rng.integers(1, 51, rows).astype(np.float64)
+        extended_prices = np.round(quantities * _retail_price(parts), 2)
+        discounts = rng.integers(0, 11, rows) / 100
+        taxes = rng.integers(0, 9, rows) / 100
+        ship_dates = order_dates[order_index] + _days(rng, 1, 122, rows)
+        commit_dates = order_dates[order_index] + _days(rng, 30, 91, rows)
+        receipt_dates = ship_dates + _days(rng, 1, 31, rows)
+        return_flags = np.where(
+            receipt_dates <= CURRENT_DATE,
+            np.where(rng.random(rows) < 0.5, "R", "A"),
+            "N",
+        )
+        shipped = ship_dates <= CURRENT_DATE
+        line_statuses = np.where(shipped, "F", "O")
+
+        # F when every line item has shipped, O when none has, P otherwise
+        shipped_lines = np.bincount(
+            order_index, weights=shipped.astype(np.float64), minlength=size
+        )
+        order_statuses = np.where(
+            shipped_lines == counts, "F", np.where(shipped_lines == 0, "O", "P")
+        )
+        total_prices = np.round(
+            np.bincount(
+                order_index,
+                weights=extended_prices * (1 + taxes) * (1 - discounts),
+                minlength=size,
+            ),
+            2,
+        )
+
+        clerks = rng.integers(1, max(2, int(1000 * self.scale_factor)) + 1, size)
+        orders = [
+            pa.array(keys),
+            pa.array(customers),
+            pa.array(order_statuses),
+            pa.array(total_prices),
+            pa.array(order_dates, type=pa.date32()),
+            _choice(rng, PRIORITIES, size),
+            _keyed("Clerk#", clerks),
+            pa.array(np.zeros(size, dtype=np.int64)),
+            _comments(rng, size),
+        ]
+        lineitems = [
+            pa.array(keys[order_index]),
+            pa.array(parts),
+            pa.array(suppliers),
+            pa.array(line_numbers),
+            pa.array(quantities),
+            pa.array(extended_prices),
+            pa.array(discounts),
+            pa.array(taxes),
+            pa.array(return_flags),
+            pa.array(line_statuses),
+            pa.array(ship_dates, type=pa.date32()),
+            pa.array(commit_dates, type=pa.date32()),
+            pa.array(receipt_dates, type=pa.date32()),
+            _choice(rng, INSTRUCTIONS, rows),
+            _choice(rng, MODES, rows),
+            _comments(rng, rows),
+        ]
+        return orders, lineitems
+
+    def _supplier_of(self, parts: np.ndarray, index: np.ndarray) -> np.ndarray:
+        """The `index`th (0 to 3) supplier of each part, as dbgen assigns them."""
+        suppliers = self.suppliers
+        return (
+            parts + index * (suppliers // 4 + (parts - 1) // suppliers)
+        ) % suppliers + 1
+
+
+def _retail_price(parts: np.ndarray) -> np.ndarray:
+    return (90_000 + (parts // 10) % 20_001 + 100 * (parts % 1_000)) / 100
+
+
+def _days(rng: np.random.Generator, low: int, high: int, size: int) -> np.ndarray:
+    """Random day offsets from `low` up to but excluding `high`."""
+    return rng.integers(low, high, size).astype("timedelta64[D]")
+
+
+def _money(rng: np.random.Generator, low: int, high: int, size: int) -> np.ndarray:
+    """Random amounts between `low` and `high` cents."""
+    return rng.integers(low, high + 1, size) / 100
+
+
+def _choice(rng: np.random.Generator, values: List[str], size: int) -> pa.Array:
+    return pa.array(values).take(pa.array(rng.integers(0, len(values), size)))
+
+
+def _join(
+    rng: np.random.Generator, words: List[str], count: int, size: int
+) -> np.ndarray:
+    """`count` random words joined by spaces."""
+    vocabulary = np.array(words, dtype=object)
+    picked = vocabulary[rng.integers(0, len(words), (size, count))]
+    joined = picked[:, 0]
+    for column in range(1, count):
+        joined = joined + " " + picked[:, column]
+    return joined
+
+
+def _syllables(
+    rng: np.random.Generator, syllables: List[List[str]], size: int
+) -> pa.Array:
+    joined = np.array(syllables[0], dtype=object)[
+        rng.integers(0, len(syllables[0]), size)
+    ]
+    for options in syllables[1:]:
+        picked = np.array(options, dtype=object)[rng.integers(0, len(options), size)]
+        joined = joined + " " + picked
+    return pa.array(joined, type=pa.string())
+
+
+def _comments(rng: np.random.Generator, size: int) -> pa.Array:
+    return pa.array(_join(rng, COMMENT_WORDS, 6, size), type=pa.string())
+
+
+def _addresses(rng: np.random.Generator, size: int) -> pa.Array:
+    return pa.array(_join(rng, COMMENT_WORDS, 2, size), type=pa.string())
+
+
+def _keyed(prefix: str, keys: np.ndarray) -> pa.Array:
+    """Names like Supplier#000000001."""
+    return pa.array(np.char.add(prefix, np.char.zfill(keys.astype(str), 9)))
+
+
+def _phones(rng: np.random.Generator, nations: np.ndarray) -> pa.Array:
+    """Phone numbers, the country code derived from the nation as Q22 expects."""
+    parts = [
+        (nations + 10).astype(str),
+        np.char.zfill(rng.integers(100, 1000, len(nations)).astype(str), 3),
+        np.char.zfill(rng.integers(100, 1000, len(nations)).astype(str), 3),
+        np.char.zfill(rng.integers(1000, 10000, len(nations)).astype(str), 4),
+    ]
+    phones = parts[0]
+    for part in parts[1:]:
+        phones = np.char.add(np.char.add(phones, "-"), part)
+    return pa.array(phones)
+
+
+# The 22 TPC-H queries with the validation substitution parameters. Q15's view
+# is inlined as a common table expression, and a few constructs are spelled in
+# the subset of SQL every engine understands.
+QUERIES = {
+    1: """
+        SELECT l_returnflag, l_linestatus,
+            SUM(l_quantity) AS sum_qty,
+            SUM(l_extendedprice) AS sum_base_price,
+            SUM(l_extendedprice * (1 - l_discount)) AS sum_disc_price,
+            SUM(l_extendedprice * (1 - l_discount) * (1 + l_tax)) AS sum_charge,
+            AVG(l_quantity) AS avg_qty,
+            AVG(l_extendedprice) AS avg_price,
+            AVG(l_discount) AS avg_disc,
+            COUNT(*) AS count_order
+        FROM {lineitem}
+        WHERE l_shipdate <= DATE '1998-12-01' - INTERVAL '90' DAY
+        GROUP BY l_returnflag, l_linestatus
+        ORDER BY l_returnflag, l_linestatus
+    """,
+    2: """
+        SELECT s_acctbal, s_name, n_name, p_partkey, p_mfgr, s_address, s_phone,
+            s_comment
+        FROM {part}, {supplier}, {partsupp}, {nation}, {region}
+        WHERE p_partkey = ps_partkey
+            AND s_suppkey = ps_suppkey
+            AND p_size = 15
+            AND p_type LIKE '%BRASS'
+            AND s_nationkey = n_nationkey
+            AND n_regionkey = r_regionkey
+            AND r_name = 'EUROPE'
+            AND ps_supplycost = (
+                SELECT MIN(ps_supplycost)
+                FROM {partsupp}, {supplier}, {nation}, {region}
+                WHERE p_partkey = ps_partkey
+                    AND s_suppkey = ps_suppkey
+                    AND s_nationkey = n_nationkey
+                    AND n_regionkey = r_regionkey
+                    AND r_name = 'EUROPE'
+            )
+        ORDER BY s_acctbal DESC, n_name, s_name, p_partkey
+        LIMIT 100
+    """,
+    3: """
+        SELECT l_orderkey,
+            SUM(l_extendedprice * (1 - l_discount)) AS revenue,
+            o_orderdate, o_shippriority
+        FROM {customer}, {orders}, {lineitem}
+        WHERE c_mktsegment = 'BUILDING'
+            AND c_custkey = o_custkey
+            AND l_orderkey = o_orderkey
+            AND o_orderdate < DATE '1995-03-15'
+            AND l_shipdate > DATE '1995-03-15'
+        GROUP BY l_orderkey, o_orderdate, o_shippriority
+        ORDER BY revenue DESC, o_orderdate
+        LIMIT 10
+    """,
+    4: """
+        SELECT o_orderpriority, COUNT(*) AS order_count
+        FROM {orders}
+        WHERE o_orderdate >= DATE '1993-07-01'
+            AND o_orderdate < DATE '1993-07-01' + INTERVAL '3' MONTH
+            AND EXISTS (
+                SELECT *
+                FROM {lineitem}
+                WHERE l_orderkey = o_orderkey AND l_commitdate < l_receiptdate
+            )
+        GROUP BY o_orderpriority
+        ORDER BY o_orderpriority
+    """,
+    5: """
+        SELECT n_name, SUM(l_extendedprice * (1 - l_discount)) AS revenue
+        FROM {customer}, {orders}, {lineitem}, {supplier}, {nation}, {region}
+        WHERE c_custkey = o_custkey
+            AND l_orderkey = o_orderkey
+            AND l_suppkey = s_suppkey
+            AND c_nationkey = s_nationkey
+            AND s_nationkey = n_nationkey
+            AND n_regionkey = r_regionkey
+            AND r_name = 'ASIA'
+            AND o_orderdate >= DATE '1994-01-01'
+            AND o_orderdate < DATE '1994-01-01' + INTERVAL '1' YEAR
+        GROUP BY n_name
+        ORDER BY revenue DESC
+    """,
+    6: """
+        SELECT SUM(l_extendedprice * l_discount) AS revenue
+        FROM {lineitem}
+        WHERE l_shipdate >= DATE '1994-01-01'
+            AND l_shipdate < DATE '1994-01-01' + INTERVAL '1' YEAR
+            AND l_discount BETWEEN 0.06 - 0.01 AND 0.06 + 0.01
+            AND l_quantity < 24
+    """,
+    7: """
+        SELECT supp_nation, cust_nation, l_year, SUM(volume) AS revenue
+        FROM (
+            SELECT n1.n_name AS supp_nation, n2.n_name AS cust_nation,
+                EXTRACT(YEAR FROM l_shipdate) AS l_year,
+                l_extendedprice * (1 - l_discount) AS volume
+            FROM {supplier}, {lineitem}, {orders}, {customer}, {nation} n1,
+                {nation} n2
+            WHERE s_suppkey = l_suppkey
+                AND o_orderkey = l_orderkey
+                AND c_custkey = o_custkey
+                AND s_nationkey = n1.n_nationkey
+                AND c_nationkey = n2.n_nationkey
+                AND (
+                    (n1.n_name = 'FRANCE' AND n2.n_name = 'GERMANY')
+                    OR (n1.n_name = 'GERMANY' AND n2.n_name = 'FRANCE')
+                )
+                AND l_shipdate BETWEEN DATE '1995-01-01' AND DATE '1996-12-31'
+        ) AS shipping
+        GROUP BY supp_nation, cust_nation, l_year
+        ORDER BY supp_nation, cust_nation, l_year
+    """,
+    8: """
+        SELECT o_year,
+            SUM(CASE WHEN nation = 'BRAZIL' THEN volume ELSE 0 END) / SUM(volume)
+                AS mkt_share
+        FROM (
+            SELECT EXTRACT(YEAR FROM o_orderdate) AS o_year,
+                l_extendedprice * (1 - l_discount) AS volume,
+                n2.n_name AS nation
+            FROM {part}, {supplier}, {lineitem}, {orders}, {customer},
+                {nation} n1, {nation} n2, {region}
+            WHERE p_partkey = l_partkey
+                AND s_suppkey = l_suppkey
+                AND l_orderkey = o_orderkey
+                AND o_custkey = c_custkey
+                AND c_nationkey = n1.n_nationkey
+                AND n1.n_regionkey = r_regionkey
+                AND r_name = 'AMERICA'
+                AND s_nationkey = n2.n_nationkey
+                AND o_orderdate BETWEEN DATE '1995-01-01' AND DATE '1996-12-31'
+                AND p_type = 'ECONOMY ANODIZED STEEL'
+        ) AS all_nations
+        GROUP BY o_year
+        ORDER BY o_year
+    """,
+    9: """
+        SELECT nation, o_year, SUM(amount) AS sum_profit
+        FROM (
+            SELECT n_name AS nation,
+                EXTRACT(YEAR FROM o_orderdate) AS o_year,
+                l_extendedprice * (1 - l_discount) - ps_supplycost * l_quantity
+                    AS amount
+            FROM {part}, {supplier}, {lineitem}, {partsupp}, {orders}, {nation}
+            WHERE s_suppkey = l_suppkey
+                AND ps_suppkey = l_suppkey
+                AND ps_partkey = l_partkey
+                AND p_partkey = l_partkey
+                AND o_orderkey = l_orderkey
+                AND s_nationkey = n_nationkey
+                AND p_name LIKE '%green%'
+        ) AS profit
+        GROUP BY nation, o_year
+        ORDER BY nation, o_year DESC
+    """,
+    10: """
+        SELECT c_custkey, c_name,
+            SUM(l_extendedprice * (1 - l_discount)) AS revenue,
+            c_acctbal, n_name, c_address, c_phone, c_comment
+        FROM {customer}, {orders}, {lineitem}, {nation}
+        WHERE c_custkey = o_custkey
+            AND l_orderkey = o_orderkey
+            AND o_orderdate >= DATE '1993-10-01'
+            AND o_orderdate < DATE '1993-10-01' + INTERVAL '3' MONTH
+            AND l_returnflag = 'R'
+            AND c_nationkey = n_nationkey
+        GROUP BY c_custkey, c_name, c_acctbal, c_phone, n_name, c_address,
+            c_comment
+        ORDER BY revenue DESC
+        LIMIT 20
+    """,
+    11: """
+        SELECT ps_partkey, SUM(ps_supplycost * ps_availqty) AS value
+        FROM {partsupp}, {supplier}, {nation}
+        WHERE ps_suppkey = s_suppkey
+            AND s_nationkey = n_nationkey
+            AND n_name = 'GERMANY'
+        GROUP BY ps_partkey
+        HAVING SUM(ps_supplycost * ps_availqty) > (
+            SELECT SUM(ps_supplycost * ps_availqty) * {fraction}
+            FROM {partsupp}, {supplier}, {nation}
+            WHERE ps_suppkey = s_suppkey
+                AND s_nationkey = n_nationkey
+                AND n_name = 'GERMANY'
+        )
+        ORDER BY value DESC
+    """,
+    12: """
+        SELECT l_shipmode,
+            SUM(CASE WHEN o_orderpriority = '1-URGENT'
+                OR o_orderpriority = '2-HIGH' THEN 1 ELSE 0 END)
+                AS high_line_count,
+            SUM(CASE WHEN o_orderpriority <> '1-URGENT'
+                AND o_orderpriority <> '2-HIGH' THEN 1 ELSE 0 END)
+                AS low_line_count
+        FROM {orders}, {lineitem}
+        WHERE o_orderkey = l_orderkey
+            AND l_shipmode IN ('MAIL', 'SHIP')
+            AND l_commitdate < l_receiptdate
+            AND l_shipdate < l_commitdate
+            AND l_receiptdate >= DATE '1994-01-01'
+            AND l_receiptdate < DATE '1994-01-01' + INTERVAL '1' YEAR
+        GROUP BY l_shipmode
+        ORDER BY l_shipmode
+    """,
+    13: """
+        SELECT c_count, COUNT(*) AS custdist
+        FROM (
+            SELECT c_custkey, COUNT(o_orderkey) AS c_count
+            FROM {customer} LEFT OUTER JOIN {orders}
+                ON c_custkey = o_custkey
+                AND o_comment NOT LIKE '%special%requests%'
+            GROUP BY c_custkey
+        ) AS c_orders
+        GROUP BY c_count
+        ORDER BY custdist DESC, c_count DESC
+    """,
+    14: """
+        SELECT 100.00 * SUM(CASE WHEN p_type LIKE 'PROMO%'
+                THEN l_extendedprice * (1 - l_discount) ELSE 0 END)
+            / SUM(l_extendedprice * (1 - l_discount)) AS promo_revenue
+        FROM {lineitem}, {part}
+        WHERE l_partkey = p_partkey
+            AND l_shipdate >= DATE '1995-09-01'
+            AND l_shipdate < DATE '1995-09-01' + INTERVAL '1' MONTH
+    """,
+    15: """
+        WITH revenue0 AS (
+            SELECT l_suppkey AS supplier_no,
+                SUM(l_extendedprice * (1 - l_discount)) AS total_revenue
+            FROM {lineitem}
+            WHERE l_shipdate >= DATE '1996-01-01'
+                AND l_shipdate < DATE '1996-01-01' + INTERVAL '3' MONTH
+            GROUP BY l_suppkey
+        )
+        SELECT s_suppkey, s_name, s_address, s_phone, total_revenue
+        FROM {supplier}, revenue0
+        WHERE s_suppkey = supplier_no
+            AND total_revenue = (SELECT MAX(total_revenue) FROM revenue0)
+        ORDER BY s_suppkey
+    """,
+    16: """
+        SELECT p_brand, p_type, p_size, COUNT(DISTINCT ps_suppkey) AS supplier_cnt
+        FROM {partsupp}, {part}
+        WHERE p_partkey = ps_partkey
+            AND p_brand <> 'Brand#45'
+            AND p_type NOT LIKE 'MEDIUM POLISHED%'
+            AND p_size IN (49, 14, 23, 45, 19, 3, 36, 9)
+            AND ps_suppkey NOT IN (
+                SELECT s_suppkey
+                FROM {supplier}
+                WHERE s_comment LIKE '%Customer%Complaints%'
+            )
+        GROUP BY p_brand, p_type, p_size
+        ORDER BY supplier_cnt DESC, p_brand, p_type, p_size
+    """,
+    17: """
+        SELECT SUM(l_extendedprice) / 7.0 AS avg_yearly
+        FROM {lineitem}, {part}
+        WHERE p_partkey = l_partkey
+            AND p_brand = 'Brand#23'
+            AND p_container = 'MED BOX'
+            AND l_quantity < (
+                SELECT 0.2 * AVG(l_quantity)
+                FROM {lineitem}
+                WHERE l_partkey = p_partkey
+            )
+    """,
+    18: """
+        SELECT c_name, c_custkey, o_orderkey, o_orderdate, o_totalprice,
+            SUM(l_quantity)
+        FROM {customer}, {orders}, {lineitem}
+        WHERE o_orderkey IN (
+                SELECT l_orderkey
+                FROM {lineitem}
+                GROUP BY l_orderkey
+                HAVING SUM(l_quantity) > 300
+            )
+            AND c_custkey = o_custkey
+            AND o_orderkey = l_orderkey
+        GROUP BY c_name, c_custkey, o_orderkey, o_orderdate, o_totalprice
+        ORDER BY o_totalprice DESC, o_orderdate
+        LIMIT 100
+    """,
+    19: """
+        SELECT SUM(l_extendedprice * (1 - l_discount)) AS revenue
+        FROM {lineitem}, {part}
+        WHERE (
+                p_partkey = l_partkey
+                AND p_brand = 'Brand#12'
+                AND p_container IN ('SM CASE', 'SM BOX', 'SM PACK', 'SM PKG')
+                AND l_quantity >= 1 AND l_quantity <= 1 + 10
+                AND p_size BETWEEN 1 AND 5
+                AND l_shipmode IN ('AIR', 'AIR REG')
+                AND l_shipinstruct = 'DELIVER IN PERSON'
+            ) OR (
+                p_partkey = l_partkey
+                AND p_brand = 'Brand#23'
+                AND p_container IN ('MED BAG', 'MED BOX', 'MED PKG', 'MED PACK')
+                AND l_quantity >= 10 AND l_quantity <= 10 + 10
+                AND p_size BETWEEN 1 AND 10
+                AND l_shipmode IN ('AIR', 'AIR REG')
+                AND l_shipinstruct = 'DELIVER IN PERSON'
+            ) OR (
+                p_partkey = l_partkey
+                AND p_brand = 'Brand#34'
+                AND p_container IN ('LG CASE', 'LG BOX', 'LG PACK', 'LG PKG')
+                AND l_quantity >= 20 AND l_quantity <= 20 + 10
+                AND p_size BETWEEN 1 AND 15
+                AND l_shipmode IN ('AIR', 'AIR REG')
+                AND l_shipinstruct = 'DELIVER IN PERSON'
+            )
+    """,
+    20: """
+        SELECT s_name, s_address
+        FROM {supplier}, {nation}
+        WHERE s_suppkey IN (
+                SELECT ps_suppkey
+                FROM {partsupp}
+                WHERE ps_partkey IN (
+                        SELECT p_partkey FROM {part} WHERE p_name LIKE 'forest%'
+                    )
+                    AND ps_availqty > (
+                        SELECT 0.5 * SUM(l_quantity)
+                        FROM {lineitem}
+                        WHERE l_partkey = ps_partkey
+                            AND l_suppkey = ps_suppkey
+                            AND l_shipdate >= DATE '1994-01-01'
+                            AND l_shipdate < DATE '1994-01-01' + INTERVAL '1' YEAR
+                    )
+            )
+            AND s_nationkey = n_nationkey
+            AND n_name = 'CANADA'
+        ORDER BY s_name
+    """,
+    21: """
+        SELECT s_name, COUNT(*) AS numwait
+        FROM {supplier}, {lineitem} l1, {orders}, {nation}
+        WHERE s_suppkey = l1.l_suppkey
+            AND o_orderkey = l1.l_orderkey
+            AND o_orderstatus = 'F'
+            AND l1.l_receiptdate > l1.l_commitdate
+            AND EXISTS (
+                SELECT *
+                FROM {lineitem} l2
+                WHERE l2.l_orderkey = l1.l_orderkey
+                    AND l2.l_suppkey <> l1.l_suppkey
+            )
+            AND NOT EXISTS (
+                SELECT *
+                FROM {lineitem} l3
+                WHERE l3.l_orderkey = l1.l_orderkey
+                    AND l3.l_suppkey <> l1.l_suppkey
+                    AND l3.l_receiptdate > l3.l_commitdate
+            )
+            AND s_nationkey = n_nationkey
+            AND n_name = 'SAUDI ARABIA'
+        GROUP BY s_name
+        ORDER BY numwait DESC, s_name
+        LIMIT 100
+    """,
+    22: """
+        SELECT cntrycode, COUNT(*) AS numcust, SUM(c_acctbal) AS totacctbal
+        FROM (
+            SELECT SUBSTRING(c_phone, 1, 2) AS cntrycode, c_acctbal
+            FROM {customer}
+            WHERE SUBSTRING(c_phone, 1, 2)
+                    IN ('13', '31', '23', '29', '30', '18', '17')
+                AND c_acctbal > (
+                    SELECT AVG(c_acctbal)
+                    FROM {customer}
+                    WHERE c_acctbal > 0.00
+                        AND SUBSTRING(c_phone, 1, 2)
+                            IN ('13', '31', '23', '29', '30', '18', '17')
+                )
+                AND NOT EXISTS (
+                    SELECT * FROM {orders} WHERE o_custkey = c_custkey
+                )
+        ) AS custsale
+        GROUP BY cntrycode
+        ORDER BY cntrycode
+    """,
+}
+
+
+class TPCHBenchmarkSuite(TestSuite):
+    """TPC-H benchmark suite.
+
+    Generates the TPC-H tables locally at the suite's scale factor, loads them
+    through pyiceberg and times each of the 22 queries on the query engine.
+    Each query is a test of its own, so its latency is recorded with the
+    results."""
+
+    name = "tpch"
+    description = "TPC-H benchmark suite"
+    tests = (
+        ["test_load_tables"]
+        + [f"q{number:02d}" for number in QUERIES]
+        + ["test_drop_tables"]
+    )
+
+    def __init__(
+        self,
+        storage: Storage,
+        catalog: Catalog,
+        query_engine: QueryEngine,
+        namespace: Optional[str] = None,
+        scale_factor: float = 0,
+        benchmark: Optional[LatencyBenchmark] = None,
+        options: Optional[Dict[str, str]] = None,
+    ):
+        """A scale factor of 1 is the canonical 1GB of TPC-H data. Without one,
+        the suite runs at a small scale factor of 0.01."""
+        super().__init__(
+            storage,
+            catalog,
+            query_engine,
+            namespace,
+            scale_factor or 0.01,
+            benchmark,
+            options,
+        )
+        self.generator = TPCHGenerator(self.scale_factor)
+        self.table_names = {
+            table: self.table_name(f"tpch_{table}") for table in SCHEMAS
+        }
+        self.tables = {
+            table: f"{self.test_schema}.{name}"
+            for table, name in self.table_names.items()
+        }
+
+    def run_test(self, test: str) -> None:
+        # The queries are tests named q01 to q22
+        if test.startswith("q"):
+            self.run_query(int(test[1:]))
+        else:
+            super().run_test(test)
+
+    def test_load_tables(self):
+        catalog = self.iceberg_catalog()
+        for table in TABLES:
+            with self._create(catalog, table).transaction() as transaction:
+                for batch in self.generator.batches(table):
+                    transaction.append(pa.Table.from_batches([batch]))
+
+        orders = self._create(catalog, "orders")
+        lineitem = self._create(catalog, "lineitem")
+        with orders.transaction() as orders_transaction:
+            with lineitem.transaction() as lineitem_transaction:
+                for orders_batch, lineitem_batch in self.generator.order_batches():
+                    orders_transaction.append(pa.Table.from_batches([orders_batch]))
+                    lineitem_transaction.append(
+                        pa.Table.from_batches([lineitem_batch])
+                    )
+
+        for table in self.tables.values():
+            self.query_engine.link_table(table)
+
+    def run_query(self, number: int) -> List[List]:
+        query = QUERIES[number].format(
+            # Q11 looks for the parts making up a share of the stock that
+            # shrinks as the data grows
+            fraction=0.0001 / self.scale_factor,
+            **self.tables,
+        )
+        return self.measure_query(query)
+
+    def test_drop_tables(self):
+        catalog = self.iceberg_catalog()
+        for table, name in self.table_names.items():
+            self.query_engine.unlink_table(self.tables[table])
+            catalog.drop_table(f"{self.catalog.catalog_name}.{name}")
+
+    def _create(self, catalog, table: str):
+        name = self.table_names[table]
+        return catalog.create_table(
+            f"{self.catalog.catalog_name}.{name}",
+            schema=SCHEMAS[table],
+            location=f"{self.storage.bucket_url}/{self.catalog.catalog_name}/{name}",
+        )
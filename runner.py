@@ -1,12 +1,19 @@
 #!/usr/bin/env python3
 import click
+import functools
 import importlib
+import threading
+import logging
+import os
 import pkgutil
 import inspect
-from typing import Any, Type, Dict, List
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Hashable, Type, Dict, List, Optional, Set, Tuple
 from pathlib import Path
 import sys
+import time
 import yaml
+from dataclasses import asdict
 from datetime import datetime
 
 # Add the package to the Python path
@@ -18,9 +25,34 @@ from iceberg_test.base import (
     Catalog,
     QueryEngine,
     IcebergComponent,
+    TeardownQueue,
     TestContext,
+    logger,
 )
+from iceberg_test.benchmark import LatencyBenchmark, summarize
+from iceberg_test.images import prefetch_images
+from iceberg_test.matrix import (
+    DEFAULT_JOURNAL_PATH,
+    CheckpointJournal,
+    MatrixRunner,
+    StackOutcome,
+    StackSpec,
+    group_by_shared_prefix,
+    stacks_from_database,
+)
+from iceberg_test.scheduler import (
+    DurationEstimator,
+    ScheduledGroup,
+    makespan,
+    schedule,
+)
+from iceberg_test.test_suite.commits import CommitStressSuite
+from iceberg_test.test_suite.compaction import CompactionSuite
+from iceberg_test.test_suite.metadata import CatalogMetadataSuite
+from iceberg_test.test_suite.partitioning import PartitioningSuite
 from iceberg_test.test_suite.sql_tests import SQLTestSuite
+from iceberg_test.test_suite.time_travel import TimeTravelSuite
+from iceberg_test.test_suite.tpch import TPCHBenchmarkSuite
 
 
 class ComponentType:
@@ -109,19 +141,121 @@ class ComponentType:
         )
 
 
+def run_dag(tasks: Dict[Hashable, Tuple[Callable[[], None], List[Hashable]]]):
+    """Run callables concurrently, each one as soon as all of its dependencies
+    have finished. Raises the first failure once running tasks have settled."""
+    pending = dict(tasks)
+    done = set()
+    running = {}
+
+    with ThreadPoolExecutor(
+        max_workers=len(tasks), thread_name_prefix=threading.current_thread().name
+    ) as executor:
+        while pending or running:
+            for key, (fn, dependencies) in list(pending.items()):
+                if all(dependency in done for dependency in dependencies):
+                    running[executor.submit(fn)] = key
+                    del pending[key]
+
+            if not running:
+                raise RuntimeError(f"Unsatisfiable dependencies: {list(pending)}")
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                key = running.pop(future)
+                # Raising here lets the executor wait for tasks already in
+                # flight, so nothing is torn down while it is still booting
+                future.result()
+                done.add(key)
+
+
+class ComponentPipeline:
+    """Sets up components concurrently instead of in nesting order.
+
+    Every component boots as soon as the pipeline starts; its wire phase runs
+    once its own boot and the wiring of its dependencies are done. Components
+    are torn down in reverse order on exit, like nested `with` blocks."""
+
+    def __init__(self, components: List[IcebergComponent]):
+        self.components = components
+        self._started: List[IcebergComponent] = []
+
+    def __enter__(self):
+        tasks = {}
+        for component in self.components:
+            tasks[("boot", component)] = (self._phase(component, "boot"), [])
+            tasks[("wire", component)] = (
+                self._phase(component, "wire"),
+                [("boot", component)]
+                + [
+                    ("wire", dependency)
+                    for dependency in component.dependencies
+                    if dependency in self.components
+                ],
+            )
+
+        try:
+            run_dag(tasks)
+        except BaseException:
+            try:
+                self.__exit__(*sys.exc_info())
+            except Exception:
+                pass  # Already logged, the setup failure is the one to report
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        error = None
+        for component in reversed(self.components):
+            if component not in self._started:
+                continue
+            try:
+                component.__exit__(exc_type, exc_value, traceback)
+            except Exception as e:
+                logger.error(f"{component.name} teardown() failed: {e}")
+                error = error or e
+        self._started.clear()
+        if error is not None:
+            raise error
+        return False
+
+    def _phase(self, component: IcebergComponent, phase: str) -> Callable[[], None]:
+        def run():
+            if phase == "boot":
+                self._started.append(component)
+            logger.info(f"{component.name} {phase}()")
+            with component.timed(phase):
+                getattr(component, phase)()
+            logger.info(f"{component.name} {phase}() done")
+
+        return run
+
+
+def summarize_status(results: List[Dict[str, Any]]) -> str:
+    successful_count = sum(1 for result in results if result.get("status") == "success")
+    status = "failed"
+    if results and successful_count == len(results):
+        status = "success"
+    elif successful_count > 0:
+        status = "partial"
+    return status
+
+
 def record_results(
     query_engine: str,
     catalog: str,
     storage: str,
     success: bool,
     results: List[Dict[str, Any]],
+    duration: Optional[float] = None,
+    timings: Optional[Dict[str, Dict[str, float]]] = None,
+    suite: str = "sql",
+    scale_factor: float = 0,
+    benchmark: Optional[LatencyBenchmark] = None,
+    suite_options: Optional[Dict[str, str]] = None,
+    component_options: Optional[Dict[str, Any]] = None,
 ):
-    successful_count = sum(1 for result in results if result.get("status") == "success")
-    status = "failed"
-    if successful_count == len(results):
-        status = "success"
-    elif successful_count > 0:
-        status = "partial"
+    status = summarize_status(results)
 
     new_result = {
         "query_engine": query_engine,
@@ -135,6 +269,20 @@ def record_results(
             "tests": results,
         },
     }
+    if duration is not None:
+        new_result["results"]["duration"] = round(duration, 1)
+    if timings:
+        new_result["results"]["timings"] = round_timings(timings)
+    if suite != "sql":
+        new_result["results"]["suite"] = suite
+    if scale_factor:
+        new_result["results"]["scale_factor"] = scale_factor
+    if benchmark is not None:
+        new_result["results"]["benchmark"] = benchmark.to_dict()
+    if suite_options:
+        new_result["results"]["suite_options"] = suite_options
+    if component_options and any(component_options.values()):
+        new_result["results"]["component_options"] = component_options
 
     with open("database/results.yml", "r") as file:
         results = yaml.safe_load(file)
@@ -145,10 +293,33 @@ def record_results(
         yaml.dump(results, file)
 
 
+def round_timings(timings: Dict[str, Dict[str, float]]) -> Dict[str, Dict[str, float]]:
+    return {
+        component: {phase: round(seconds, 3) for phase, seconds in phases.items()}
+        for component, phases in timings.items()
+    }
+
+
 # Define component types
 STORAGE = ComponentType(Storage, "storage", "storage backend")
 CATALOG = ComponentType(Catalog, "catalog", "catalog service")
 QUERY_ENGINE = ComponentType(QueryEngine, "query_engine", "query engine")
+SUITES = {
+    suite.name: suite
+    for suite in (
+        SQLTestSuite,
+        TPCHBenchmarkSuite,
+        TimeTravelSuite,
+        CompactionSuite,
+        PartitioningSuite,
+        CommitStressSuite,
+        CatalogMetadataSuite,
+    )
+}
+COMPONENT_TYPES = {
+    component_type.package_path: component_type
+    for component_type in (STORAGE, CATALOG, QUERY_ENGINE)
+}
 
 
 @click.group()
@@ -202,7 +373,15 @@ def list_components():
     default=False,
     help="If set, a local breakpoint will be set",
 )
-def start(storage, catalog, query_engine, wait, break_):
+@click.option(
+    "--trino-workers",
+    default=0,
+    show_default=True,
+    type=click.IntRange(min=0),
+    help="Trino worker nodes besides the coordinator. With 0, the coordinator "
+    "runs queries itself",
+)
+def start(storage, catalog, query_engine, wait, break_, trino_workers):
     """Set up and tear down one or more components. Does not run tests, but does
     allow partial configuration (storage or storage+catalog)"""
 
@@ -230,38 +409,21 @@ def start(storage, catalog, query_engine, wait, break_):
             click.secho(f"Error: --catalog requires --storage", fg="red", err=True)
             sys.exit(1)
 
-    with TestContext() as test_context:
-        with storage_class(test_context) as storage_impl:
-            if catalog_class is not None:
-                with catalog_class(test_context, storage_impl) as catalog_impl:
-                    if query_engine_class is not None:
-                        with query_engine_class(
-                            test_context, storage_impl, catalog_impl
-                        ) as query_engine_impl:
-                            if wait:
-                                click.echo(
-                                    "Stack ready for manual testing (--wait), press enter to tear it down"
-                                )
-                                input()
-                            elif break_:
-                                breakpoint()
-                    else:
-                        if wait:
-                            click.echo(
-                                "Stack ready for manual testing (--wait), press enter to tear it down"
-                            )
-                            input()
-                        elif break_:
-                            breakpoint()
-
-            else:
-                if wait:
-                    click.echo(
-                        "Stack ready for manual testing (--wait), press enter to tear it down"
-                    )
-                    input()
-                elif break_:
-                    breakpoint()
+    with TestContext(options={"trino_workers": trino_workers}) as test_context:
+        components = [storage_class(test_context)]
+        if catalog_class is not None:
+            components.append(catalog_class(test_context, components[0]))
+        if query_engine_class is not None:
+            components.append(query_engine_class(test_context, *components))
+
+        with ComponentPipeline(components):
+            if wait:
+                click.echo(
+                    "Stack ready for manual testing (--wait), press enter to tear it down"
+                )
+                input()
+            elif break_:
+                breakpoint()
 
 
 @cli.command(name="test")
@@ -279,9 +441,12 @@ def start(storage, catalog, query_engine, wait, break_):
 )
 @click.option(
     "--query-engine",
+    "query_engines",
     required=True,
+    multiple=True,
     type=click.Choice(QUERY_ENGINE.get_click_choices()),
-    help="Query engine to test",
+    help="Query engine to test, may be repeated to run several engines in turn "
+    "against the same storage and catalog",
 )
 @click.option(
     "--wait/--no-wait",
@@ -293,43 +458,866 @@ def start(storage, catalog, query_engine, wait, break_):
     default=False,
     help="If set, test result will be recorded in the database",
 )
-def test(storage, catalog, query_engine, wait, record):
+@click.option(
+    "--prefetch/--no-prefetch",
+    default=True,
+    help="If set, the stack's docker images are pulled in parallel up front",
+)
+@click.option(
+    "--background-teardown/--no-background-teardown",
+    default=False,
+    help="If set, teardown runs in the background and is only waited for at exit",
+)
+@click.option(
+    "--suite",
+    default="sql",
+    show_default=True,
+    type=click.Choice(sorted(SUITES)),
+    help="Test suite to run: the SQL compatibility tests, the TPC-H benchmark, "
+    "the time travel scaling curve, small file compaction, partition pruning, "
+    "concurrent commits or catalog metadata throughput",
+)
+@click.option(
+    "--scale-factor",
+    default=0.0,
+    show_default=True,
+    type=click.FloatRange(min=0),
+    help="Size of the generated data: millions of extra orders for the SQL "
+    "suite, the TPC-H scale factor (default 0.01) for the benchmark",
+)
+@click.option(
+    "--benchmark/--no-benchmark",
+    default=False,
+    help="If set, read-only queries run repeatedly and their latency "
+    "percentiles are reported",
+)
+@click.option(
+    "--warmup",
+    default=3,
+    show_default=True,
+    type=click.IntRange(min=0),
+    help="Benchmark runs of each query that are discarded before measuring",
+)
+@click.option(
+    "--repetitions",
+    default=10,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Measured benchmark runs of each query",
+)
+@click.option(
+    "--trino-workers",
+    default=0,
+    show_default=True,
+    type=click.IntRange(min=0),
+    help="Trino worker nodes besides the coordinator. With 0, the coordinator "
+    "runs queries itself",
+)
+@click.option(
+    "--suite-option",
+    "suite_options",
+    multiple=True,
+    callback=lambda ctx, param, value: parse_suite_options(value),
+    help="Suite specific setting as KEY=VALUE, may be repeated",
+)
+def test(
+    storage,
+    catalog,
+    query_engines,
+    wait,
+    record,
+    prefetch,
+    background_teardown,
+    suite,
+    scale_factor,
+    benchmark,
+    warmup,
+    repetitions,
+    suite_options,
+    trino_workers,
+):
     """Run Iceberg REST stack compatibility tests."""
     click.echo("Starting compatibility test run...")
+    benchmark = LatencyBenchmark(warmup, repetitions) if benchmark else None
+    component_options = {"trino_workers": trino_workers}
+    specs = [
+        StackSpec(storage, catalog, query_engine)
+        for query_engine in dict.fromkeys(query_engines)
+    ]
+    if prefetch:
+        prefetch_stack_images(specs)
+
+    teardown_queue = TeardownQueue() if background_teardown else None
+    outcomes = run_stack_group(
+        specs,
+        wait=wait,
+        teardown_queue=teardown_queue,
+        suite=suite,
+        scale_factor=scale_factor,
+        benchmark=benchmark,
+        suite_options=suite_options,
+        component_options=component_options,
+    )
+    teardown_failed = wait_for_teardowns(teardown_queue)
+
+    if record:
+        for outcome in outcomes:
+            record_results(
+                outcome.spec.query_engine,
+                catalog,
+                storage,
+                outcome.success,
+                outcome.results,
+                duration=outcome.elapsed,
+                timings=outcome.timings,
+                suite=suite,
+                scale_factor=scale_factor,
+                benchmark=benchmark,
+                suite_options=suite_options,
+                component_options=component_options,
+            )
+
+    print_timing_summary(outcomes)
+    if benchmark is not None:
+        print_latency_summary(outcomes)
+    print_metrics_summary(outcomes)
+    if len(outcomes) > 1:
+        print_matrix_summary(outcomes)
+
+    success = all(outcome.success for outcome in outcomes) and not teardown_failed
+    description = SUITES[suite].description
+    if success:
+        click.secho(
+            f"\n✨ {description} passed successfully!",
+            fg="green",
+            bold=True,
+        )
+    else:
+        click.secho(f"\n❌ {description} failed", fg="red", bold=True)
+
+    sys.exit(0 if success else 1)
+
+
+@cli.command(name="matrix")
+@click.option(
+    "--stack",
+    "stacks",
+    multiple=True,
+    help="Stack to test as storage/catalog/query_engine, may be repeated",
+)
+@click.option(
+    "--all-stacks/--no-all-stacks",
+    default=False,
+    help="If set, test every compatible stack listed in database/*.yml",
+)
+@click.option(
+    "--concurrency",
+    default=os.cpu_count() or 1,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Maximum number of stacks running at the same time",
+)
+@click.option(
+    "--reuse/--no-reuse",
+    default=False,
+    help="If set, stacks sharing a storage and catalog boot them once and run "
+    "their query engines in turn",
+)
+@click.option(
+    "--record/--no-record",
+    default=False,
+    help="If set, test results will be recorded in the database",
+)
+@click.option(
+    "--report",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Write a combined YAML report of every stack to this path",
+)
+@click.option(
+    "--prefetch/--no-prefetch",
+    default=True,
+    help="If set, the docker images of all stacks are pulled in parallel up front",
+)
+@click.option(
+    "--background-teardown/--no-background-teardown",
+    default=False,
+    help="If set, each stack is torn down in the background while the next one "
+    "starts, and teardowns are only waited for at exit",
+)
+@click.option(
+    "--journal",
+    "journal_path",
+    default=str(DEFAULT_JOURNAL_PATH),
+    show_default=True,
+    type=click.Path(dir_okay=False, writable=True),
+    help="Checkpoint journal recording the progress of the run",
+)
+@click.option(
+    "--resume/--no-resume",
+    default=False,
+    help="If set, stacks that already completed according to the journal are "
+    "skipped and their recorded results reused",
+)
+@click.option(
+    "--plan",
+    is_flag=True,
+    help="Print the predicted schedule and wall time without running anything",
+)
+@click.option(
+    "--suite",
+    default="sql",
+    show_default=True,
+    type=click.Choice(sorted(SUITES)),
+    help="Test suite to run: the SQL compatibility tests, the TPC-H benchmark, "
+    "the time travel scaling curve, small file compaction, partition pruning, "
+    "concurrent commits or catalog metadata throughput",
+)
+@click.option(
+    "--scale-factor",
+    default=0.0,
+    show_default=True,
+    type=click.FloatRange(min=0),
+    help="Size of the generated data: millions of extra orders for the SQL "
+    "suite, the TPC-H scale factor (default 0.01) for the benchmark",
+)
+@click.option(
+    "--benchmark/--no-benchmark",
+    default=False,
+    help="If set, read-only queries run repeatedly and their latency "
+    "percentiles are reported",
+)
+@click.option(
+    "--warmup",
+    default=3,
+    show_default=True,
+    type=click.IntRange(min=0),
+    help="Benchmark runs of each query that are discarded before measuring",
+)
+@click.option(
+    "--repetitions",
+    default=10,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Measured benchmark runs of each query",
+)
+@click.option(
+    "--trino-workers",
+    default=0,
+    show_default=True,
+    type=click.IntRange(min=0),
+    help="Trino worker nodes besides the coordinator. With 0, the coordinator "
+    "runs queries itself",
+)
+@click.option(
+    "--suite-option",
+    "suite_options",
+    multiple=True,
+    callback=lambda ctx, param, value: parse_suite_options(value),
+    help="Suite specific setting as KEY=VALUE, may be repeated",
+)
+def matrix(
+    stacks,
+    all_stacks,
+    concurrency,
+    reuse,
+    record,
+    report,
+    prefetch,
+    background_teardown,
+    journal_path,
+    resume,
+    plan,
+    suite,
+    scale_factor,
+    benchmark,
+    warmup,
+    repetitions,
+    suite_options,
+    trino_workers,
+):
+    """Run the test suite against many stacks concurrently.
+
+    Stacks are started longest first, based on how long they took in previous
+    runs, so that no slow stack is left running alone at the end."""
+    specs = select_stacks(stacks, all_stacks)
+    benchmark = LatencyBenchmark(warmup, repetitions) if benchmark else None
+    component_options = {"trino_workers": trino_workers}
+    # A dry run must not wipe the journal of the run it plans to resume
+    try:
+        journal = (
+            CheckpointJournal(
+                journal_path,
+                resume=resume,
+                settings={
+                    "suite": suite,
+                    "scale_factor": scale_factor,
+                    "benchmark": benchmark.to_dict() if benchmark else None,
+                    "suite_options": suite_options,
+                    "component_options": component_options,
+                },
+            )
+            if resume or not plan
+            else None
+        )
+    except ValueError as e:
+        raise click.UsageError(f"{e}. Run without --resume to start over")
+    completed = journal.completed if journal else {}
+    pending = [spec for spec in specs if spec not in completed]
+    if len(pending) < len(specs):
+        click.echo(
+            f"Resuming from {journal_path}: {len(specs) - len(pending)} stacks "
+            "already completed"
+        )
+
+    groups = group_by_shared_prefix(pending) if reuse else [[s] for s in pending]
+    estimator = DurationEstimator.from_results(
+        expected_duration,
+        suite=suite,
+        scale_factor=scale_factor,
+        benchmark=benchmark.to_dict() if benchmark else None,
+    )
+    planned = schedule(groups, concurrency, estimator)
+    if plan:
+        print_plan(planned, concurrency)
+        return
+
+    if prefetch and pending:
+        prefetch_stack_images(pending)
+
+    # Stacks log concurrently, so tag every line with the stack it came from
+    for handler in logging.getLogger().handlers:
+        handler.setFormatter(
+            logging.Formatter("%(levelname)s:%(threadName)s:%(name)s:%(message)s")
+        )
+
+    click.echo(
+        f"Running {len(pending)} stacks in {len(groups)} groups "
+        f"with concurrency {concurrency}, expected to take "
+        f"{makespan(planned):.0f}s..."
+    )
+    teardown_queue = TeardownQueue(concurrency) if background_teardown else None
+    run_group = functools.partial(
+        run_stack_group,
+        teardown_queue=teardown_queue,
+        journal=journal,
+        suite=suite,
+        scale_factor=scale_factor,
+        benchmark=benchmark,
+        suite_options=suite_options,
+        component_options=component_options,
+    )
+    finished = {
+        outcome.spec: outcome
+        for outcome in MatrixRunner(
+            run_group, concurrency, exclusive=fixed_name_components(pending)
+        ).run([group.specs for group in planned])
+    }
+    outcomes = [finished.get(spec) or journal.completed[spec] for spec in specs]
+    teardown_failed = wait_for_teardowns(teardown_queue)
+
+    if record:
+        for outcome in outcomes:
+            if outcome.results:
+                record_results(
+                    outcome.spec.query_engine,
+                    outcome.spec.catalog,
+                    outcome.spec.storage,
+                    outcome.success,
+                    outcome.results,
+                    duration=outcome.elapsed,
+                    timings=outcome.timings,
+                    suite=suite,
+                    scale_factor=scale_factor,
+                    benchmark=benchmark,
+                    suite_options=suite_options,
+                    component_options=component_options,
+                )
+
+    if report:
+        write_report(outcomes, report)
+
+    print_timing_summary(outcomes)
+    if benchmark is not None:
+        print_latency_summary(outcomes)
+    print_metrics_summary(outcomes)
+    print_matrix_summary(outcomes)
+    success = all(outcome.success for outcome in outcomes) and not teardown_failed
+    sys.exit(0 if success else 1)
+
+
+def parse_suite_options(values: Tuple[str, ...]) -> Dict[str, str]:
+    options = {}
+    for value in values:
+        key, separator, option = value.partition("=")
+        if not separator or not key:
+            raise click.BadParameter(
+                f"Invalid suite option '{value}', expected KEY=VALUE",
+                param_hint="--suite-option",
+            )
+        options[key] = option
+    return options
+
+
+def expected_duration(role: str, name: str) -> float:
+    """Default duration of a component that has no recorded timings yet."""
+    return COMPONENT_TYPES[role].get_implementation(name).expected_duration
+
+
+def fixed_name_components(specs: List[StackSpec]) -> Set[Tuple[str, str]]:
+    """(role, name) of the components that can't run in two stacks at once,
+    since they create account-wide resources under fixed names."""
+    return {
+        (role, name)
+        for spec in specs
+        for role, name in asdict(spec).items()
+        if COMPONENT_TYPES[role].get_implementation(name).fixed_names
+    }
+
+
+def print_plan(planned: List[ScheduledGroup], concurrency: int):
+    click.secho(f"\nPredicted schedule with concurrency {concurrency}:", bold=True)
+    for group in sorted(planned, key=lambda group: (group.start, group.slot)):
+        label = (
+            group.specs[0].label
+            if len(group.specs) == 1
+            else f"{group.specs[0].storage}/{group.specs[0].catalog}/"
+            + ",".join(spec.query_engine for spec in group.specs)
+        )
+        click.echo(
+            f"  slot {group.slot:>2}  {group.start:7.0f}s - {group.end:7.0f}s  {label}"
+        )
+    click.secho(f"\nPredicted wall time: {makespan(planned):.0f}s", bold=True)
+
+
+def wait_for_teardowns(teardown_queue: Optional[TeardownQueue]) -> bool:
+    """Wait for background teardowns, report failures and return whether any
+    teardown failed."""
+    if teardown_queue is None:
+        return False
+
+    failures = teardown_queue.wait()
+    for name, error in failures:
+        click.secho(f"❌ Teardown of {name} failed: {error}", fg="red", err=True)
+    return bool(failures)
+
+
+@cli.command(name="prefetch")
+@click.option(
+    "--stack",
+    "stacks",
+    multiple=True,
+    help="Stack to prefetch as storage/catalog/query_engine, may be repeated",
+)
+@click.option(
+    "--all-stacks/--no-all-stacks",
+    default=False,
+    help="If set, prefetch every compatible stack listed in database/*.yml",
+)
+@click.option(
+    "--concurrency",
+    default=8,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Maximum number of images pulled at the same time",
+)
+@click.option(
+    "--refresh/--no-refresh",
+    default=False,
+    help="If set, pull every image again even if it is cached, to pick up moved tags",
+)
+def prefetch(stacks, all_stacks, concurrency, refresh):
+    """Pull the docker images of the selected stacks ahead of time."""
+    specs = select_stacks(stacks, all_stacks)
+    prefetch_stack_images(specs, concurrency=concurrency, refresh=refresh)
+
+
+def select_stacks(stacks: List[str], all_stacks: bool) -> List[StackSpec]:
+    """Resolve --stack / --all-stacks into the list of runnable stacks."""
+    try:
+        specs = [StackSpec.parse(stack) for stack in stacks]
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--stack")
+
+    if all_stacks:
+        specs += [spec for spec in stacks_from_database() if spec not in specs]
+
+    specs = [spec for spec in specs if is_runnable(spec)]
+    if not specs:
+        raise click.UsageError("No runnable stacks, pass --stack or --all-stacks")
+    return specs
+
+
+def prefetch_stack_images(
+    specs: List[StackSpec], concurrency: int = 8, refresh: bool = False
+):
+    """Pull every docker image used by the given stacks, in parallel."""
+    images = {
+        image
+        for spec in specs
+        for component_type, name in (
+            (STORAGE, spec.storage),
+            (CATALOG, spec.catalog),
+            (QUERY_ENGINE, spec.query_engine),
+        )
+        for image in component_type.get_implementation(name).images
+    }
+    if not images:
+        return
+
+    click.echo(f"Prefetching {len(images)} docker images...")
+    outcomes = prefetch_images(images, concurrency=concurrency, refresh=refresh)
+    for image, outcome in outcomes.items():
+        click.secho(
+            f"  {image}: {outcome}", fg="yellow" if outcome == "failed" else None
+        )
+
+
+def run_stack_group(
+    specs: List[StackSpec],
+    wait: bool = False,
+    teardown_queue: Optional[TeardownQueue] = None,
+    journal: Optional[CheckpointJournal] = None,
+    suite: str = "sql",
+    scale_factor: float = 0,
+    benchmark: Optional[LatencyBenchmark] = None,
+    suite_options: Optional[Dict[str, str]] = None,
+    component_options: Optional[Dict[str, Any]] = None,
+) -> List[StackOutcome]:
+    """Boot a storage + catalog once and run the test suite against each
+    query engine of the group in turn.
+
+    All stacks in a group must share the same storage and catalog. When more
+    than one engine runs, each one gets its own table namespace so they can't
+    see each other's data. Time spent on the shared storage and catalog is split
+    evenly across the stacks that reused it. Progress is checkpointed to
+    `journal` after every test and every stack."""
+    storage, catalog = specs[0].storage, specs[0].catalog
+    assert all(spec.storage == storage and spec.catalog == catalog for spec in specs)
+
     storage_class = STORAGE.get_implementation(storage)
     catalog_class = CATALOG.get_implementation(catalog)
-    query_engine_class = QUERY_ENGINE.get_implementation(query_engine)
-    with TestContext() as test_context:
-        with storage_class(test_context) as storage_impl:
-            with catalog_class(test_context, storage_impl) as catalog_impl:
-                with query_engine_class(
-                    test_context, storage_impl, catalog_impl
-                ) as query_engine_impl:
-                    click.echo("\nRunning SQL test suite...")
-                    sql_suite = SQLTestSuite(
-                        storage_impl, catalog_impl, query_engine_impl
+    outcomes = []
+    # Stacks already written to the journal
+    checkpointed = set()
+
+    start = time.monotonic()
+    with TestContext(
+        teardown_queue=teardown_queue, options=component_options
+    ) as test_context:
+        storage_impl = storage_class(test_context)
+        catalog_impl = catalog_class(test_context, storage_impl)
+
+        if len(specs) == 1:
+            # A single engine can boot alongside the storage and catalog
+            spec = specs[0]
+            query_engine_class = QUERY_ENGINE.get_implementation(spec.query_engine)
+            query_engine_impl = query_engine_class(
+                test_context, storage_impl, catalog_impl
+            )
+            with ComponentPipeline([storage_impl, catalog_impl, query_engine_impl]):
+                outcome = run_suite(
+                    spec,
+                    storage_impl,
+                    catalog_impl,
+                    query_engine_impl,
+                    wait=wait,
+                    journal=journal,
+                    suite=suite,
+                    scale_factor=scale_factor,
+                    benchmark=benchmark,
+                    suite_options=suite_options,
+                )
+                outcomes.append(outcome)
+        else:
+            with ComponentPipeline([storage_impl, catalog_impl]):
+                for spec in specs:
+                    outcome = run_query_engine(
+                        spec,
+                        storage_impl,
+                        catalog_impl,
+                        namespace=spec.query_engine,
+                        wait=wait,
+                        journal=journal,
+                        suite=suite,
+                        scale_factor=scale_factor,
+                        benchmark=benchmark,
+                        suite_options=suite_options,
                     )
-                    success, results = sql_suite.run()
-
-                    if record:
-                        record_results(query_engine, catalog, storage, success, results)
-
-                    if success:
-                        click.secho(
-                            "\n✨ All SQL tests passed successfully!",
-                            fg="green",
-                            bold=True,
-                        )
-                    else:
-                        click.secho("\n❌ SQL tests failed", fg="red", bold=True)
-
-                    if wait:
-                        click.echo(
-                            "--wait was passed, keeping stack up. Press enter to exit"
-                        )
-                        input()
-
-                    sys.exit(0 if success else 1)
+                    outcomes.append(outcome)
+                    # Checkpoint right away, a crash in a later engine of the
+                    # group shouldn't make this one run again
+                    if journal is not None and outcome.error is None:
+                        outcome.timings["storage"] = storage_impl.timings
+                        outcome.timings["catalog"] = catalog_impl.timings
+                        journal.record_stack(outcome)
+                        checkpointed.add(outcome.spec)
+
+    shared = (time.monotonic() - start) - sum(o.elapsed for o in outcomes)
+    for outcome in outcomes:
+        outcome.elapsed += shared / len(outcomes)
+        # Shared with the components, so background teardowns are included
+        # once they are done
+        outcome.timings["storage"] = storage_impl.timings
+        outcome.timings["catalog"] = catalog_impl.timings
+        # One entry per stack
+        if journal is not None and outcome.spec not in checkpointed:
+            journal.record_stack(outcome)
+    return outcomes
+
+
+def run_query_engine(
+    spec: StackSpec,
+    storage_impl: Storage,
+    catalog_impl: Catalog,
+    namespace: Optional[str] = None,
+    wait: bool = False,
+    journal: Optional[CheckpointJournal] = None,
+    suite: str = "sql",
+    scale_factor: float = 0,
+    benchmark: Optional[LatencyBenchmark] = None,
+    suite_options: Optional[Dict[str, str]] = None,
+) -> StackOutcome:
+    """Boot one query engine against a running storage + catalog, run the
+    test suite and tear the engine down again."""
+    query_engine_class = QUERY_ENGINE.get_implementation(spec.query_engine)
+    test_context = storage_impl.test_context
+
+    start = time.monotonic()
+    try:
+        query_engine_impl = query_engine_class(
+            test_context, storage_impl, catalog_impl
+        )
+        # The next engine reuses this one's ports and compose project, so it
+        # has to be gone before that one boots
+        query_engine_impl.background_teardown = False
+        with query_engine_impl:
+            outcome = run_suite(
+                spec,
+                storage_impl,
+                catalog_impl,
+                query_engine_impl,
+                namespace=namespace,
+                wait=wait,
+                journal=journal,
+                suite=suite,
+                scale_factor=scale_factor,
+                benchmark=benchmark,
+                suite_options=suite_options,
+            )
+    except Exception as e:
+        # Keep the shared storage + catalog alive for the remaining engines
+        logger.error(f"❌ {spec.label}: {str(e)}", exc_info=True)
+        return StackOutcome(
+            spec=spec,
+            success=False,
+            elapsed=time.monotonic() - start,
+            error=str(e),
+        )
+
+    outcome.elapsed = time.monotonic() - start
+    return outcome
+
+
+def run_suite(
+    spec: StackSpec,
+    storage_impl: Storage,
+    catalog_impl: Catalog,
+    query_engine_impl: QueryEngine,
+    namespace: Optional[str] = None,
+    wait: bool = False,
+    journal: Optional[CheckpointJournal] = None,
+    suite: str = "sql",
+    scale_factor: float = 0,
+    benchmark: Optional[LatencyBenchmark] = None,
+    suite_options: Optional[Dict[str, str]] = None,
+) -> StackOutcome:
+    """Run a test suite against a stack that is up and running."""
+    start = time.monotonic()
+    suite_class = SUITES[suite]
+    click.echo(f"\nRunning {suite_class.description} on {spec.label}...")
+    test_suite = suite_class(
+        storage_impl,
+        catalog_impl,
+        query_engine_impl,
+        namespace=namespace,
+        scale_factor=scale_factor,
+        benchmark=benchmark,
+        options=suite_options,
+    )
+    success, results = test_suite.run(
+        on_result=None
+        if journal is None
+        else functools.partial(journal.record_test, spec)
+    )
+
+    if wait:
+        click.echo("--wait was passed, keeping stack up. Press enter to exit")
+        input()
+
+    return StackOutcome(
+        spec=spec,
+        success=success,
+        results=results,
+        elapsed=time.monotonic() - start,
+        # Shared with the component, so teardown is included once it's done
+        timings={"query_engine": query_engine_impl.timings},
+    )
+
+
+def is_runnable(spec: StackSpec) -> bool:
+    """Whether every component of the stack has an implementation."""
+    missing = [
+        f"{component_type.display_name} '{name}'"
+        for component_type, name in (
+            (STORAGE, spec.storage),
+            (CATALOG, spec.catalog),
+            (QUERY_ENGINE, spec.query_engine),
+        )
+        if name not in component_type.implementations
+    ]
+    if missing:
+        click.secho(
+            f"Skipping {spec.label}: no implementation for {', '.join(missing)}",
+            fg="yellow",
+            err=True,
+        )
+    return not missing
+
+
+def write_report(outcomes: List[StackOutcome], path: str):
+    report = {
+        "as_of": datetime.now().strftime("%Y-%m-%d"),
+        "stacks": [
+            {
+                "storage": outcome.spec.storage,
+                "catalog": outcome.spec.catalog,
+                "query_engine": outcome.spec.query_engine,
+                "status": summarize_status(outcome.results),
+                "elapsed": round(outcome.elapsed, 1),
+                "error": outcome.error,
+                "timings": round_timings(outcome.timings),
+                "latency": summarize(stack_latencies(outcome.results)),
+                "tests": outcome.results,
+            }
+            for outcome in outcomes
+        ],
+    }
+
+    with open(path, "w") as file:
+        yaml.dump(report, file)
+
+
+def print_timing_summary(outcomes: List[StackOutcome]):
+    """Print where the time went for each stack: component lifecycle phases,
+    then each test with the share of it spent in queries, and of that, the
+    time the engine reports queueing, planning and on CPU."""
+    phases = ["boot", "ready", "wire", "setup", "teardown"]
+    engine_times = ["queued_time", "planning_time", "cpu_time"]
+
+    for outcome in outcomes:
+        click.secho(
+            f"\nTimings for {outcome.spec.label} ({outcome.elapsed:.1f}s):", bold=True
+        )
+        click.echo(f"  {'component':<14}" + "".join(f"{p:>10}" for p in phases))
+        for component, timings in outcome.timings.items():
+            click.echo(
+                f"  {component:<14}"
+                + "".join(
+                    f"{timings[p]:>9.2f}s" if p in timings else f"{'-':>10}"
+                    for p in phases
+                )
+            )
+
+        if outcome.results:
+            width = max(len(result["test"]) for result in outcome.results)
+            click.echo(
+                f"  {'test':<{width}}  {'duration':>9}  {'queries':>7}  {'in queries':>10}"
+                + "".join(f"{t.removesuffix('_time'):>10}" for t in engine_times)
+            )
+            for result in outcome.results:
+                stats = result.get("query_stats", {})
+                click.echo(
+                    f"  {result['test']:<{width}}  {result.get('duration', 0):>8.2f}s"
+                    f"  {result.get('query_count', 0):>7}"
+                    f"  {result.get('query_duration', 0):>9.2f}s"
+                    + "".join(
+                        f"{stats[t]:>9.2f}s" if t in stats else f"{'-':>10}"
+                        for t in engine_times
+                    )
+                )
+
+
+def stack_latencies(results: List[Dict[str, Any]]) -> List[float]:
+    """Every latency sample taken while running a stack's tests."""
+    return [
+        sample
+        for result in results
+        for query in result.get("latency", [])
+        for sample in query["samples"]
+    ]
+
+
+def print_latency_summary(outcomes: List[StackOutcome]):
+    """Print latency percentiles of every benchmarked query, and of all of a
+    stack's queries together."""
+    columns = ["min", "p50", "p95", "p99", "max"]
+
+    for outcome in outcomes:
+        queries = [q for result in outcome.results for q in result.get("latency", [])]
+        if not queries:
+            continue
+
+        click.secho(f"\nLatency for {outcome.spec.label}:", bold=True)
+        width = max(len(q["query"]) for q in queries + [{"query": "all queries"}])
+        click.echo(f"  {'query':<{width}}" + "".join(f"{c:>10}" for c in columns))
+        overall = {
+            "query": "all queries",
+            **summarize(stack_latencies(outcome.results)),
+        }
+        for query in queries + [overall]:
+            click.echo(
+                f"  {query['query']:<{width}}"
+                + "".join(f"{query[c]:>9.3f}s" for c in columns)
+            )
+
+
+def print_metrics_summary(outcomes: List[StackOutcome]):
+    """Print the metrics recorded by each test, one row per test, e.g. a
+    latency curve over snapshot counts."""
+    for outcome in outcomes:
+        rows = [result for result in outcome.results if result.get("metrics")]
+        if not rows:
+            continue
+
+        columns = list(dict.fromkeys(m for row in rows for m in row["metrics"]))
+        width = max(len(row["test"]) for row in rows)
+        click.secho(f"\nMetrics for {outcome.spec.label}:", bold=True)
+        click.echo(f"  {'test':<{width}}" + "".join(f"{c:>16}" for c in columns))
+        for row in rows:
+            click.echo(
+                f"  {row['test']:<{width}}"
+                + "".join(
+                    f"{format_metric(row['metrics'].get(c)):>16}" for c in columns
+                )
+            )
+
+
+def format_metric(value: Any) -> str:
+    return "-" if value is None else str(value)
+
+
+def print_matrix_summary(outcomes: List[StackOutcome]):
+    click.secho("\nMatrix summary:", bold=True)
+    width = max(len(outcome.spec.label) for outcome in outcomes)
+    for outcome in outcomes:
+        passed = sum(1 for result in outcome.results if result["status"] == "success")
+        line = (
+            f"  {outcome.spec.label:<{width}}  {passed:>2}/{len(outcome.results):<2} "
+            f"passed  {outcome.elapsed:7.1f}s"
+        )
+        if outcome.error:
+            line += f"  ({outcome.error})"
+        click.secho(line, fg="green" if outcome.success else "red")
 
 
 if __name__ == "__main__":
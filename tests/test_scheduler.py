@@ -0,0 +1,54 @@
+from iceberg_test.matrix import StackSpec
+from iceberg_test.scheduler import DurationEstimator
+
+
+def record(timings, **results):
+    return {
+        "storage": "minio",
+        "catalog": "nessie",
+        "query_engine": "trino",
+        "results": {"timings": timings, "tests": [], **results},
+    }
+
+
+def estimator(*history):
+    return DurationEstimator(list(history), default_for=lambda role, name: 100.0)
+
+
+def test_component_from_setup_and_teardown():
+    estimate = estimator(record({"storage": {"setup": 20.0, "teardown": 3.0}}))
+    assert estimate.component("storage", "minio") == 23.0
+
+
+def test_component_from_pipeline_phases():
+    # ComponentPipeline records boot and wire instead of setup
+    estimate = estimator(
+        record(
+            {"storage": {"boot": 20.0, "wire": 2.0, "ready": 15.0, "teardown": 3.0}}
+        )
+    )
+    assert estimate.component("storage", "minio") == 25.0
+
+
+def test_component_falls_back_to_default():
+    assert estimator().component("catalog", "nessie") == 100.0
+
+
+def test_stack_estimate_from_component_timings():
+    estimate = estimator(
+        record(
+            {
+                "storage": {"boot": 20.0, "wire": 2.0, "teardown": 3.0},
+                "catalog": {"boot": 10.0, "wire": 5.0, "teardown": 1.0},
+                "query_engine": {"boot": 30.0, "wire": 1.0, "teardown": 4.0},
+            }
+        )
+    )
+    assert estimate.stack(StackSpec("minio", "nessie", "trino")) == 76.0
+
+
+def test_other_suites_are_ignored():
+    estimate = estimator(
+        record({"storage": {"boot": 20.0, "teardown": 3.0}}, suite="tpch")
+    )
+    assert estimate.component("storage", "minio") == 100.0
@@ -18,7 +18,12 @@ def load_yaml(file_path):
 
 DATABASE_PATH = "../database"
 
-results = load_yaml(f"{DATABASE_PATH}/results.yml")["results"]
+# Only the SQL suite's results are compatibility results, the benchmark suites
+# record theirs under their own "suite"
+results = [
+    result for result in load_yaml(f"{DATABASE_PATH}/results.yml")["results"]
+    if result["results"].get("suite", "sql") == "sql"
+]
 posts = load_yaml(f"{DATABASE_PATH}/posts.yml")["posts"]
 object_stores = load_yaml(f"{DATABASE_PATH}/storage.yml").keys()
 query_engines = load_yaml(f"{DATABASE_PATH}/query_engine.yml").keys()